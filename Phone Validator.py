@@ -1,16 +1,39 @@
 import streamlit as st
-import phonenumbers
-from phonenumbers import geocoder, carrier, timezone
+from streamlit import runtime
+from streamlit.runtime.scriptrunner import get_script_run_ctx
 import pandas as pd
 import sys
 from pathlib import Path
-import pycountry
 from io import BytesIO
 import csv
+import inspect
+import time
+import atexit
+import shutil
+import tempfile
+import threading
+import uuid
+from concurrent.futures import CancelledError
 
 # Add utils to path
 sys.path.append(str(Path(__file__).parent))
-from utils.phone_length_validator import validate_phone_length, is_tollfree_number, check_duplicate_country_code
+from utils.phone_checker import FAIL_FAST, FULL_DETAIL, VERSION_FIELD, check_phone_cached, check_phone_detailed, get_checker_version, get_region_allowlist, preload_lookups
+from utils.delta_revalidation import load_results, revalidate_delta
+from utils.validation_backends import BACKENDS, get_backend
+from utils.batch_executor import run_batch
+from utils.duplicate_detection import DuplicateTracker, flag_duplicates
+from utils.validation_aggregates import ValidationAggregate, SUMMARY_METRICS
+from utils.sampled_preview import PREVIEW_METRICS, preview_quality
+from utils.worker_pool import SharedWorkerPool
+
+# Rows kept on screen when a batch was spilled to disk
+SPILL_PREVIEW_ROWS = 10000
+
+# As-you-type validation waits for this many digits before checking
+LIVE_MIN_DIGITS = 5
+# Commit the live input after a short typing pause; Streamlit versions without
+# text_input(live=...) fall back to committing on Enter or blur
+LIVE_INPUT_OPTIONS = {"live": "150ms"} if "live" in inspect.signature(st.text_input).parameters else {}
 
 # Page configuration
 st.set_page_config(
@@ -129,152 +152,189 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 # ---------- Core Functions ----------
-def checkphone(phone_input, display=True):
+def render_phone_result(details):
+    """Display the checks and enrichment for one validated number"""
+    if details['status'] == 'region_not_allowed':
+        st.warning(f"🚫 {details['error']}")
+        return
+    if details['error'] is not None:
+        st.error(f"❌ Error parsing number: {details['error']}")
+        return
+
+    result = details['result']
+    is_valid = result['is_valid']
+    is_suspicious = result['is_suspicious']
+    is_tollfree = result['is_tollfree']
+    country = result['country']
+    region_code = result['region_code']
+    sim_carrier = result['carrier']
+    tz_str = result['timezone']
+    international_format = result['international']
+    e164_format = result['e164']
+    country_code = details['country_code']
+    length_validation = details['length_validation']
+    duplicate_check = details['duplicate_check']
+    tollfree_result = details['tollfree_result']
+
+    # First row: Invalid format, Invalid Length, Toll-free
+    col_status1, col_status2, col_status3 = st.columns(3)
+    
+    with col_status1:
+        if not is_valid:
+            st.error("❌ Invalid Format")
+        else:
+            st.success("✅ Valid Format")
+    
+    with col_status2:
+        if length_validation['is_valid_length'] is False:
+            st.error(f"❌ Invalid Length")
+        elif length_validation['is_valid_length'] is True:
+            st.success(f"✅ Valid Length ({length_validation['actual_length']} digits)")
+        else:
+            st.info(f"ℹ️ {length_validation['message']}")
+    
+    with col_status3:
+        if is_tollfree:
+            # Different display for universal vs country-specific
+            if tollfree_result.get('type') == 'universal':
+                st.warning(f"🌐 {tollfree_result['message']}")
+            else:
+                st.warning(f"📞 {tollfree_result['message']}")
+        else:
+            st.info("✓ Not toll-free")
+    
+    # Suspicious warnings (separate rows if needed)
+    if duplicate_check['has_duplicate']:
+        st.error(f"⚠️ {duplicate_check['message']}: {duplicate_check['detected_pattern']}")
+    
+    if is_suspicious:
+        st.warning("⚠️ Suspicious: Last 5 digits are identical")
+    
+    # Information columns
+    col1, col2, col3 = st.columns(3)
+    
+    with col1:
+        st.write(f"**Country:** {country if country else 'Unknown'}")
+        st.write(f"**Country Code:** +{country_code}")
+        st.write(f"**Region Code:** {region_code if region_code else 'Unknown'}")
+    
+    with col2:
+        st.write(f"**Carrier:** {sim_carrier if sim_carrier else 'Unknown'}")
+        st.write(f"**Timezone:** {tz_str}")
+        # Display expected length range
+        if length_validation.get('expected_range_display'):
+            # Remove the leading quote for display
+            display_range = length_validation['expected_range_display'].strip("'")
+            st.write(f"**Expected Length:** {display_range} digits")
+    
+    with col3:
+        st.write(f"**International:** {international_format}")
+        st.write(f"**E.164:** {e164_format}")
+        st.write(f"**Actual Length:** {length_validation['actual_length']} digits")
+
+
+def _session_alive(session_id):
+    """Whether a browser session is still connected (always true outside a server)"""
+    return not runtime.exists() or runtime.get_instance().is_active_session(session_id)
+
+
+@st.cache_resource(show_spinner=False)
+def get_session_tokens():
+    """Worker pool key of every session -> its runtime session id"""
+    return {}
+
+
+def batch_session_token():
+    """
+    This session's key on the worker pool
+
+    A token kept in session_state rather than the runtime session id, which
+    is not unique everywhere (AppTest gives every session the same one).
+    """
+    if 'batch_session_token' not in st.session_state:
+        st.session_state['batch_session_token'] = uuid.uuid4().hex
+    token = st.session_state['batch_session_token']
+    get_session_tokens()[token] = get_script_run_ctx().session_id
+    return token
+
+
+def _token_alive(token):
+    """Whether the session owning a pool token is still connected"""
+    session_id = get_session_tokens().get(token)
+    if session_id is None or _session_alive(session_id):
+        return True
+    get_session_tokens().pop(token, None)
+    return False
+
+
+@st.cache_resource(show_spinner=False)
+def preload_checker():
+    """Load the checker's lazily imported lookup tables once per server, before any user waits on them"""
+    preload_lookups()
+    return True
+
+
+@st.cache_resource(show_spinner=False)
+def get_spill_store():
+    """Spill directory of this server process (removed at exit) and the spilled batches in it, by session"""
+    spill_dir = tempfile.mkdtemp(prefix="phone_validator_spill_")
+    atexit.register(shutil.rmtree, spill_dir, True)
+    return {'dir': spill_dir, 'batches': [], 'lock': threading.Lock()}
+
+
+def keep_spilled_batch(session_id, batch):
+    """Track a spilled batch, deleting the spill files of sessions that have disconnected"""
+    store = get_spill_store()
+    with store['lock']:
+        kept = []
+        for owner, spilled in store['batches']:
+            if not Path(spilled.spill_path).exists():
+                continue  # discarded on resubmit
+            if _session_alive(owner):
+                kept.append((owner, spilled))
+            else:
+                spilled.discard()
+        kept.append((session_id, batch))
+        store['batches'] = kept
+
+
+@st.cache_resource(show_spinner=False)
+def get_worker_pool():
+    """One validation worker pool shared by every session on this server"""
+    return SharedWorkerPool(session_alive=_token_alive)
+
+
+def checkphone(phone_input, display=True, backend=None, mode=FULL_DETAIL):
     """Validate and extract information from a phone number"""
-    if not phone_input.startswith("+"):
-        phone_input = "+" + phone_input.strip()
-    
-    def check_suspicious(phone_number):
-        """Check if last 5 digits are all the same"""
-        clean_number = phone_number.replace('+', '').replace(' ', '').replace('-', '')
-        if len(clean_number) >= 5:
-            last_5 = clean_number[-5:]
-            if len(set(last_5)) == 1:
-                return True
-        return False
-    
-    try:
-        parsed_number = phonenumbers.parse(phone_input, None)
-        is_valid = phonenumbers.is_valid_number(parsed_number)
-        region_code = phonenumbers.region_code_for_number(parsed_number)
-        
-        geo_description = geocoder.description_for_number(parsed_number, "en")
-        try:
-            country_obj = pycountry.countries.get(alpha_2=region_code)
-            country = country_obj.name if country_obj else geo_description
-        except:
-            country = geo_description
-            
-        sim_carrier = carrier.name_for_number(parsed_number, "en")
-        country_code = parsed_number.country_code
-        
-        timezones = timezone.time_zones_for_number(parsed_number)
-        tz_str = ", ".join(timezones) if timezones else "Unknown"
-        
-        international_format = phonenumbers.format_number(parsed_number, phonenumbers.PhoneNumberFormat.INTERNATIONAL)
-        e164_format = phonenumbers.format_number(parsed_number, phonenumbers.PhoneNumberFormat.E164)
-        
-        # Length validation
-        length_validation = validate_phone_length(e164_format, region_code)
-        
-        # Duplicate country code check
-        duplicate_check = check_duplicate_country_code(e164_format, region_code)
-        
-        # Suspicious pattern check
-        is_suspicious = check_suspicious(e164_format)
-        
-        # Toll-free detection
-        tollfree_result = is_tollfree_number(e164_format, country_code=region_code)
-        is_tollfree = tollfree_result['is_tollfree']
-        
-        if display:
-            # First row: Invalid format, Invalid Length, Toll-free
-            col_status1, col_status2, col_status3 = st.columns(3)
-            
-            with col_status1:
-                if not is_valid:
-                    st.error("❌ Invalid Format")
-                else:
-                    st.success("✅ Valid Format")
-            
-            with col_status2:
-                if length_validation['is_valid_length'] is False:
-                    st.error(f"❌ Invalid Length")
-                elif length_validation['is_valid_length'] is True:
-                    st.success(f"✅ Valid Length ({length_validation['actual_length']} digits)")
-                else:
-                    st.info(f"ℹ️ {length_validation['message']}")
-            
-            with col_status3:
-                if is_tollfree:
-                    # Different display for universal vs country-specific
-                    if tollfree_result.get('type') == 'universal':
-                        st.warning(f"🌐 {tollfree_result['message']}")
-                    else:
-                        st.warning(f"📞 {tollfree_result['message']}")
-                else:
-                    st.info("✓ Not toll-free")
-            
-            # Suspicious warnings (separate rows if needed)
-            if duplicate_check['has_duplicate']:
-                st.error(f"⚠️ {duplicate_check['message']}: {duplicate_check['detected_pattern']}")
-            
-            if is_suspicious:
-                st.warning("⚠️ Suspicious: Last 5 digits are identical")
-            
-            # Information columns
-            col1, col2, col3 = st.columns(3)
-            
-            with col1:
-                st.write(f"**Country:** {country if country else 'Unknown'}")
-                st.write(f"**Country Code:** +{country_code}")
-                st.write(f"**Region Code:** {region_code if region_code else 'Unknown'}")
-            
-            with col2:
-                st.write(f"**Carrier:** {sim_carrier if sim_carrier else 'Unknown'}")
-                st.write(f"**Timezone:** {tz_str}")
-                # Display expected length range
-                if length_validation.get('expected_range_display'):
-                    # Remove the leading quote for display
-                    display_range = length_validation['expected_range_display'].strip("'")
-                    st.write(f"**Expected Length:** {display_range} digits")
-            
-            with col3:
-                st.write(f"**International:** {international_format}")
-                st.write(f"**E.164:** {e164_format}")
-                st.write(f"**Actual Length:** {length_validation['actual_length']} digits")
-        
-        # FIXED: Use display format for CSV/Excel compatibility
-        return {
-            "original": phone_input,
-            "is_valid": is_valid,
-            "is_valid_length": length_validation['is_valid_length'],
-            "has_duplicate_code": duplicate_check['has_duplicate'],
-            "is_suspicious": is_suspicious,
-            "is_tollfree": is_tollfree,
-            "tollfree_prefix": tollfree_result['matched_prefix'],
-            "tollfree_type": tollfree_result.get('type', None),
-            "country": country if country else "Unknown",
-            "region_code": region_code if region_code else "Unknown",
-            "carrier": sim_carrier if sim_carrier else "Unknown",
-            "international": international_format,
-            "e164": e164_format,
-            "timezone": tz_str,
-            "actual_length": length_validation['actual_length'],
-            "expected_length": length_validation['expected_range_display'] if length_validation.get('expected_range_display') else "Unknown"
-        }
-        
-    except Exception as e:
-        if display:
-            st.error(f"❌ Error parsing number: {str(e)}")
-        return {
-            "original": phone_input,
-            "is_valid": False,
-            "is_valid_length": False,
-            "has_duplicate_code": False,
-            "is_suspicious": False,
-            "is_tollfree": False,
-            "tollfree_prefix": None,
-            "tollfree_type": None,
-            "country": "Error",
-            "region_code": "Error",
-            "carrier": "Error",
-            "international": phone_input,
-            "e164": phone_input,
-            "timezone": "Error",
-            "actual_length": 0,
-            "expected_length": "Error"
-        }
+    details = check_phone_detailed(phone_input, backend=backend, mode=mode)
+    if display:
+        render_phone_result(details)
+    return details['result']
+
+
+@st.fragment
+def live_validation():
+    """As-you-type validation; only this fragment reruns on each keystroke"""
+    live_input = st.text_input(
+        "Enter a phone number (with country code):",
+        value="",
+        help="Results update as you type. The '+' sign is optional.",
+        placeholder="e.g., +1234567890 or 61872252566",
+        key="phone_input_live",
+        **LIVE_INPUT_OPTIONS
+    )
+    
+    if not live_input.strip():
+        return
+    if sum(character.isdigit() for character in live_input) < LIVE_MIN_DIGITS:
+        st.caption("⌨️ Keep typing...")
+        return
+    
+    started = time.perf_counter()
+    st.markdown("---")
+    st.markdown("### 📊 Validation Results")
+    render_phone_result(check_phone_cached(live_input, backend=st.session_state.get("validation_backend")))
+    st.caption(f"⚡ Validated in {(time.perf_counter() - started) * 1000:.1f} ms")
 
 # ---------- Sidebar ----------
 with st.sidebar:
@@ -283,6 +343,26 @@ with st.sidebar:
     show_timezone = st.checkbox("Show Timezone", value=True)
     flag_suspicious = st.checkbox("Flag Suspicious Numbers", value=True)
     flag_tollfree = st.checkbox("Flag Toll-Free Numbers", value=True)
+    batch_memory_budget = st.number_input(
+        "Batch Memory Budget (MB)",
+        min_value=16,
+        max_value=8192,
+        value=512,
+        step=64,
+        help="Batches whose results would exceed this budget are spilled to disk instead of held in memory"
+    )
+    validation_backend = st.selectbox(
+        "Validation Backend",
+        options=list(BACKENDS),
+        index=list(BACKENDS).index(get_backend().name),
+        key="validation_backend",
+        help="'phonenumbers' gives full detail (carrier, timezone, formatting); 'compiled' answers validity, region, length and toll-free from precompiled tables, faster but without carrier and timezone"
+    )
+    region_allowlist = get_region_allowlist()
+    if region_allowlist:
+        st.caption(f"🌐 Region allowlist: {', '.join(region_allowlist)}. Numbers from other regions are not validated.")
+    pool_stats = get_worker_pool().stats()
+    st.caption(f"🧵 Shared batch workers: {pool_stats['running']}/{pool_stats['workers']} busy, {pool_stats['queued']} chunks queued across {pool_stats['sessions']} sessions")
     
     st.divider()
     st.header("💡 About Validation")
@@ -312,36 +392,42 @@ with st.sidebar:
     """)
 
 # ---------- Main Content ----------
+preload_checker()
 tab1, tab2, tab3 = st.tabs(["📱 Single Validation", "📄 Batch Processing", "ℹ️ Help"])
 
 with tab1:
     st.subheader("Single Number Validation")
     
-    # Input section - full width with spacing
-    st.markdown("")  # Add spacing
-    phone_input = st.text_input(
-        "Enter a phone number (with country code):",
-        value="",
-        help="Enter the number with country code. The '+' sign is optional.",
-        placeholder="e.g., +1234567890 or 61872252566",
-        key="phone_input_single"
-    )
-    
-    st.markdown("")  # Add spacing
-    
-    # Button below input - centered
-    col_left, col_center, col_right = st.columns([2, 1, 2])
-    with col_center:
-        validate_button = st.button("🔍 Validate Number", type="primary", use_container_width=True)
+    live_mode = st.toggle("⚡ Validate as you type", value=False, key="live_validation_mode")
     
+    # Input section - full width with spacing
     st.markdown("")  # Add spacing
-    
-    # Results section - appears below with clear separator
-    if phone_input and validate_button:
-        st.markdown("---")
-        st.markdown("### 📊 Validation Results")
-        st.markdown("")
-        checkphone(phone_input)
+    if live_mode:
+        live_validation()
+    else:
+        phone_input = st.text_input(
+            "Enter a phone number (with country code):",
+            value="",
+            help="Enter the number with country code. The '+' sign is optional.",
+            placeholder="e.g., +1234567890 or 61872252566",
+            key="phone_input_single"
+        )
+        
+        st.markdown("")  # Add spacing
+        
+        # Button below input - centered
+        col_left, col_center, col_right = st.columns([2, 1, 2])
+        with col_center:
+            validate_button = st.button("🔍 Validate Number", type="primary", use_container_width=True)
+        
+        st.markdown("")  # Add spacing
+        
+        # Results section - appears below with clear separator
+        if phone_input and validate_button:
+            st.markdown("---")
+            st.markdown("### 📊 Validation Results")
+            st.markdown("")
+            checkphone(phone_input, backend=get_backend(validation_backend))
 
 with tab2:
     st.subheader("Batch Phone Number Validation")
@@ -355,6 +441,70 @@ with tab2:
         help="Enter one phone number per line",
         key="batch_input_area"
     )
+    fail_fast_checks = st.toggle(
+        "🏃 Fail-fast checks",
+        value=False,
+        help="Skip country, carrier and timezone lookups and international formatting for numbers already found invalid, wrong length or with a repeated country code. Summary counts are unchanged; the skipped columns show 'Not Checked'.",
+        key="fail_fast_checks"
+    )
+    check_mode = FAIL_FAST if fail_fast_checks else FULL_DETAIL
+    
+    with st.expander("♻️ Delta Revalidation (optional)"):
+        previous_upload = st.file_uploader(
+            "Previous results export (CSV, JSON or Parquet):",
+            type=["csv", "json", "parquet"],
+            help="Only numbers that are new, were validated under older rules or another check mode, or come from an export without a rules_version column are revalidated. Everything else is reused from this file.",
+            key="previous_results_upload"
+        )
+    
+    with st.expander("🔎 Quick Quality Preview (huge files)"):
+        preview_upload = st.file_uploader(
+            "File to preview (text, one number per line, or CSV):",
+            type=["txt", "csv"],
+            help="Validates a random sample instead of every row and estimates the quality rates of the whole file.",
+            key="preview_upload"
+        )
+        col_sample, col_method = st.columns(2)
+        with col_sample:
+            preview_sample_size = st.number_input("Sample size", min_value=100, max_value=50000, value=2000, step=500, key="preview_sample_size")
+        with col_method:
+            preview_method = st.selectbox(
+                "Sampling",
+                options=["seek", "reservoir"],
+                format_func=lambda method: {"seek": "Random offsets (fastest)", "reservoir": "Reservoir (exact, reads the whole file)"}[method],
+                key="preview_method"
+            )
+        
+        if preview_upload is not None and st.button("📐 Estimate Quality", key="preview_button"):
+            backend = get_backend(validation_backend)
+            with st.spinner("Validating a random sample..."):
+                preview = preview_quality(
+                    preview_upload,
+                    sample_size=int(preview_sample_size),
+                    method=preview_method,
+                    check=lambda phone: checkphone(phone, display=False, backend=backend, mode=FAIL_FAST)
+                )
+            
+            total_note = "" if preview['total_exact'] else "~"
+            st.caption(f"Sampled {preview['sampled']:,} of {total_note}{preview['total_lines']:,} rows in {preview['sample_seconds'] + preview['validate_seconds']:.1f}s; ranges are {preview['confidence']:.0%} confidence intervals.")
+            for metric_col, (metric_key, metric_label) in zip(st.columns(len(PREVIEW_METRICS)), PREVIEW_METRICS):
+                estimate = preview['rates'][metric_key]
+                with metric_col:
+                    st.metric(metric_label, f"{estimate['rate']:.1%}", help=f"{estimate['low']:.1%} - {estimate['high']:.1%}")
+            
+            region_rows = [
+                {
+                    'region_code': region['region_code'],
+                    'sampled': region['sampled'],
+                    'share': f"{region['share']:.1%} ({region['share_low']:.1%} - {region['share_high']:.1%})",
+                    **{
+                        metric_label: f"{region['rates'][metric_key]['rate']:.1%} ({region['rates'][metric_key]['low']:.1%} - {region['rates'][metric_key]['high']:.1%})"
+                        for metric_key, metric_label in PREVIEW_METRICS
+                    },
+                }
+                for region in preview['regions']
+            ]
+            st.dataframe(pd.DataFrame(region_rows), use_container_width=True, hide_index=True)
     
     st.markdown("")
     
@@ -370,21 +520,87 @@ with tab2:
         if batch_input.strip():
             phone_numbers = [line.strip() for line in batch_input.split('\n') if line.strip()]
             
-            results = []
-            progress_bar = st.progress(0)
-            status_text = st.empty()
-            
-            for idx, phone in enumerate(phone_numbers):
-                status_text.text(f"Processing {idx + 1}/{len(phone_numbers)}...")
-                result = checkphone(phone, display=False)
-                results.append(result)
-                progress_bar.progress((idx + 1) / len(phone_numbers))
-            
-            status_text.success(f"✅ Processed {len(results)} numbers!")
-            progress_bar.empty()
+            # Drop the spill file of the previous run, if any
+            previous_batch = st.session_state.pop('batch_spill', None)
+            if previous_batch is not None:
+                previous_batch.discard()
             
-            df = pd.DataFrame(results)
-            st.session_state['batch_results'] = df
+            if previous_upload is not None:
+                try:
+                    previous_rows = load_results(previous_upload)
+                except (ValueError, ImportError) as e:
+                    st.error(f"❌ Could not read previous results: {str(e)}")
+                    st.stop()
+                
+                with st.spinner("Revalidating changed numbers..."):
+                    backend = get_backend(validation_backend)
+                    delta = revalidate_delta(
+                        previous_rows,
+                        phone_numbers,
+                        check=lambda phone: checkphone(phone, display=False, backend=backend, mode=check_mode),
+                        backend=backend,
+                        mode=check_mode
+                    )
+                
+                flag_duplicates(delta['results'])
+                summary = delta['summary']
+                st.success(f"✅ Revalidated {summary['validated']} of {summary['total']} numbers ({summary['reused']} reused from previous results)")
+                
+                df = pd.DataFrame(delta['results'])
+                st.session_state['batch_results'] = df
+                st.session_state['batch_aggregate'] = ValidationAggregate().add_rows(delta['results'])
+                st.session_state['batch_changes'] = pd.DataFrame(delta['changes'], columns=["original", "change", "fields_changed"])
+            else:
+                progress_bar = st.progress(0)
+                status_text = st.empty()
+                
+                def show_progress(rows_done, chunk_stats):
+                    status_text.text(f"Processing {rows_done}/{len(phone_numbers)} ({chunk_stats['rows_per_sec']:,.0f} numbers/s)...")
+                    progress_bar.progress(rows_done / len(phone_numbers))
+                
+                # Chunks run on the server-wide pool, taking turns with other sessions;
+                # anything still queued from an earlier submission is dropped first
+                session_token = batch_session_token()
+                worker_pool = get_worker_pool()
+                worker_pool.cancel_session(session_token)
+                
+                # Every row carries the version it was checked under, so exports can feed delta revalidation
+                rules_version = get_checker_version(get_backend(validation_backend), check_mode)
+                
+                def validate_chunk(chunk):
+                    rows = worker_pool.validate(session_token, chunk, validation_backend, check_mode)
+                    for row in rows:
+                        row[VERSION_FIELD] = rules_version
+                    return rows
+                
+                aggregate = ValidationAggregate()
+                try:
+                    batch = run_batch(
+                        phone_numbers,
+                        memory_budget_mb=batch_memory_budget,
+                        validate_chunk=validate_chunk,
+                        progress=show_progress,
+                        aggregate=aggregate,
+                        duplicate_tracker=DuplicateTracker(),
+                        export_copies=1,  # room for one download blob, built when clicked
+                        spill_dir=get_spill_store()['dir']
+                    )
+                except CancelledError:
+                    st.warning("⚠️ Batch cancelled. Submit it again to restart.")
+                    st.stop()
+                
+                status_text.success(f"✅ Processed {batch.row_count} numbers!")
+                progress_bar.empty()
+                
+                if batch.spilled:
+                    df = pd.DataFrame(batch.head(SPILL_PREVIEW_ROWS))
+                    st.session_state['batch_spill'] = batch
+                    keep_spilled_batch(get_script_run_ctx().session_id, batch)
+                else:
+                    df = pd.DataFrame(batch.rows)
+                st.session_state['batch_results'] = df
+                st.session_state['batch_aggregate'] = aggregate
+                st.session_state.pop('batch_changes', None)
         else:
             st.warning("⚠️ Please enter at least one phone number.")
     
@@ -395,74 +611,111 @@ with tab2:
         st.markdown("")
         
         results_df = st.session_state['batch_results']
+        spilled_batch = st.session_state.get('batch_spill')
+        total_rows = spilled_batch.row_count if spilled_batch is not None else len(results_df)
         
-        st.markdown(f'<div class="metric-card">✅ Validated {len(results_df)} phone numbers successfully!</div>', 
+        st.markdown(f'<div class="metric-card">✅ Validated {total_rows} phone numbers successfully!</div>', 
                    unsafe_allow_html=True)
         
+        if spilled_batch is not None:
+            st.info(f"ℹ️ Results exceeded the {batch_memory_budget} MB memory budget and were spilled to disk. Showing the first {len(results_df)} rows; the full results are available as CSV and JSON Lines downloads below.")
+        
         st.dataframe(results_df, use_container_width=True, height=400)
         
-        # Summary stats
+        if 'batch_changes' in st.session_state:
+            changes_df = st.session_state['batch_changes']
+            with st.expander(f"♻️ Change Report ({len(changes_df)} numbers added, removed or revalidated)"):
+                st.dataframe(changes_df, use_container_width=True, height=250)
+                st.download_button(
+                    label="📥 Download Change Report",
+                    data=lambda: changes_df.to_csv(index=False, quoting=csv.QUOTE_NONNUMERIC).encode('utf-8'),
+                    file_name="phone_validation_changes.csv",
+                    mime="text/csv"
+                )
+        
+        # Summary stats (counted while the batch ran)
         st.markdown("#### 📈 Summary Statistics")
-        col_a, col_b, col_c, col_d, col_e, col_f, col_g = st.columns(7)
-        with col_a:
-            st.metric("Total", len(results_df))
-        with col_b:
-            invalid_format_count = (~results_df['is_valid']).sum()
-            st.metric("Invalid Format", invalid_format_count)
-        with col_c:
-            invalid_length_count = results_df[results_df['is_valid_length'] == False].shape[0]
-            st.metric("Invalid Length", invalid_length_count)
-        with col_d:
-            duplicate_count = results_df['has_duplicate_code'].sum()
-            st.metric("Duplicate Code", duplicate_count)
-        with col_e:
-            tollfree_count = results_df['is_tollfree'].sum()
-            st.metric("Toll-Free", tollfree_count)
-        with col_f:
-            suspicious_count = results_df['is_suspicious'].sum()
-            st.metric("Suspicious", suspicious_count)
-        with col_g:
-            valid_count = results_df['is_valid'].sum()
-            st.metric("Valid", valid_count)
+        batch_aggregate = st.session_state['batch_aggregate']
+        summary_counts = batch_aggregate.summary()
+        for metric_col, (metric_key, metric_label) in zip(st.columns(len(SUMMARY_METRICS)), SUMMARY_METRICS):
+            with metric_col:
+                st.metric(metric_label, summary_counts[metric_key])
+        
+        with st.expander("🌍 Per-Country and Carrier Breakdown"):
+            col_region, col_carrier = st.columns(2)
+            with col_region:
+                st.markdown("**By Region**")
+                st.dataframe(pd.DataFrame(batch_aggregate.breakdown("region_code")), use_container_width=True, hide_index=True)
+            with col_carrier:
+                st.markdown("**By Carrier**")
+                st.dataframe(pd.DataFrame(batch_aggregate.breakdown("carrier")), use_container_width=True, hide_index=True)
         
         # Export buttons
         st.markdown("---")
         st.markdown("#### 📥 Download Options")
-        col_x, col_y, col_z = st.columns(3)
         
-        with col_x:
-            # FIXED: Use quoting to prevent CSV interpretation issues
-            csv_data = results_df.to_csv(index=False, quoting=csv.QUOTE_NONNUMERIC).encode('utf-8')
-            st.download_button(
-                label="📥 Download CSV",
-                data=csv_data,
-                file_name="phone_validation_results.csv",
-                mime="text/csv",
-                use_container_width=True
-            )
-        
-        with col_y:
-            output = BytesIO()
-            with pd.ExcelWriter(output, engine='openpyxl') as writer:
-                results_df.to_excel(writer, index=False, sheet_name='Phone Validation')
-            output.seek(0)
-            st.download_button(
-                label="📥 Download Excel",
-                data=output,
-                file_name="phone_validation_results.xlsx",
-                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-                use_container_width=True
-            )
-        
-        with col_z:
-            json_data = results_df.to_json(orient='records', indent=2)
-            st.download_button(
-                label="📥 Download JSON",
-                data=json_data,
-                file_name="phone_validation_results.json",
-                mime="application/json",
-                use_container_width=True
-            )
+        # Export files are generated when their button is clicked, not on every rerun
+        if spilled_batch is not None:
+            # Serve the full results from disk in parts of at most the memory budget,
+            # since a clicked download is held in server memory; Excel is skipped
+            part_bytes = batch_memory_budget * 1024 * 1024
+            csv_path = spilled_batch.export_csv()
+            csv_parts = spilled_batch.export_parts(csv_path, part_bytes, header_lines=1)
+            ndjson_parts = spilled_batch.export_parts(spilled_batch.spill_path, part_bytes)
+            if len(csv_parts) > 1 or len(ndjson_parts) > 1:
+                st.caption(f"Downloads are split into parts of up to {batch_memory_budget} MB each, so serving them stays within the memory budget. Every CSV part repeats the header.")
+            col_x, col_z = st.columns(2)
+            for column, path, parts, header_lines, label, extension, mime in (
+                (col_x, csv_path, csv_parts, 1, "CSV", "csv", "text/csv"),
+                (col_z, spilled_batch.spill_path, ndjson_parts, 0, "JSON Lines", "ndjson", "application/x-ndjson"),
+            ):
+                with column:
+                    for number, (start, end) in enumerate(parts, start=1):
+                        part_suffix = f" (part {number}/{len(parts)})" if len(parts) > 1 else ""
+                        st.download_button(
+                            label=f"📥 Download {label}{part_suffix}",
+                            data=lambda path=path, start=start, end=end, header_lines=header_lines: spilled_batch.read_part(path, start, end, header_lines),
+                            file_name=f"phone_validation_results{f'_part{number}' if len(parts) > 1 else ''}.{extension}",
+                            mime=mime,
+                            use_container_width=True,
+                            key=f"download_{extension}_{number}"
+                        )
+        else:
+            col_x, col_y, col_z = st.columns(3)
+            
+            with col_x:
+                # FIXED: Use quoting to prevent CSV interpretation issues
+                st.download_button(
+                    label="📥 Download CSV",
+                    data=lambda: results_df.to_csv(index=False, quoting=csv.QUOTE_NONNUMERIC).encode('utf-8'),
+                    file_name="phone_validation_results.csv",
+                    mime="text/csv",
+                    use_container_width=True
+                )
+            
+            with col_y:
+                def excel_export():
+                    output = BytesIO()
+                    with pd.ExcelWriter(output, engine='openpyxl') as writer:
+                        results_df.to_excel(writer, index=False, sheet_name='Phone Validation')
+                    return output.getvalue()
+                
+                st.download_button(
+                    label="📥 Download Excel",
+                    data=excel_export,
+                    file_name="phone_validation_results.xlsx",
+                    mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+                    use_container_width=True
+                )
+            
+            with col_z:
+                st.download_button(
+                    label="📥 Download JSON",
+                    data=lambda: results_df.to_json(orient='records', indent=2),
+                    file_name="phone_validation_results.json",
+                    mime="application/json",
+                    use_container_width=True
+                )
 
 with tab3:
     st.subheader("ℹ️ How to Use This App")
@@ -0,0 +1,253 @@
+"""
+Streamlit App Load Test
+Simulates several concurrent users of 'Phone Validator.py' with Streamlit's
+AppTest harness. Each simulated session runs in its own thread, like a
+script thread on the server, and does a cold load, a few single-number
+validations, one batch of configurable size and an idle rerun with the
+results on screen. Reports rerun latency, time-to-results and resident
+memory per session so capacity changes can be compared before deployment.
+
+Usage:
+    python -m benchmarks.app_load_test --sessions 8 --batch-size 2000 [--single 3] [--json report.json]
+"""
+
+import argparse
+import json
+import statistics
+import sys
+import threading
+import time
+from pathlib import Path
+
+from streamlit.runtime.scriptrunner.script_cache import ScriptCache
+from streamlit.testing.v1 import AppTest
+
+from benchmarks.corpus import synthetic_numbers
+from utils.resource_usage import current_rss_bytes, peak_rss_bytes
+
+APP_PATH = Path(__file__).resolve().parent.parent / "Phone Validator.py"
+
+_COMPILE_LOCK = threading.Lock()
+
+
+def _percentile(values, percent):
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * percent / 100
+    lower = int(rank)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (rank - lower)
+
+
+def _serialize_script_compiles():
+    """
+    Compile the app script one session at a time
+
+    AppTest compiles the script into a fresh ScriptCache on every run, and
+    CPython's parser is not thread-safe: concurrent compiles fail with
+    "AST constructor recursion depth mismatch" and the run renders nothing.
+    A server compiles once through its shared cache, so serializing the
+    compiles keeps the sessions comparable to production.
+    """
+    get_bytecode = ScriptCache.get_bytecode
+    if getattr(get_bytecode, '_serialized', False):
+        return
+
+    def serialized_get_bytecode(self, script_path):
+        with _COMPILE_LOCK:
+            return get_bytecode(self, script_path)
+
+    serialized_get_bytecode._serialized = True
+    ScriptCache.get_bytecode = serialized_get_bytecode
+
+
+def _button(app, label_prefix):
+    return next(button for button in app.button if button.label.startswith(label_prefix))
+
+
+def _timed_run(app):
+    started = time.perf_counter()
+    app.run()
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    if app.exception:
+        raise RuntimeError(app.exception[0].message)
+    return elapsed_ms
+
+
+def simulate_session(session_id, batch_numbers, single_numbers, start_barrier, app_path=APP_PATH, timeout=600):
+    """
+    Run one simulated user session against the app
+
+    Args:
+        session_id (int): Session number used in the report
+        batch_numbers (list): Numbers pasted into the Batch Processing tab
+        single_numbers (list): Numbers validated one at a time
+        start_barrier (threading.Barrier): Released once every session is ready
+        app_path (str or Path): Streamlit script to load
+        timeout (float): Seconds allowed for one script run
+
+    Returns:
+        dict: Per-session timings in milliseconds plus the result row count
+    """
+    app = AppTest.from_file(str(app_path), default_timeout=timeout)
+    start_barrier.wait()
+
+    timings = {'session_id': session_id, 'single_ms': [], 'error': None}
+    try:
+        timings['cold_load_ms'] = _timed_run(app)
+
+        for phone in single_numbers:
+            app.text_input(key="phone_input_single").input(phone)
+            _button(app, "🔍").click()
+            timings['single_ms'].append(_timed_run(app))
+
+        if batch_numbers:
+            app.text_area(key="batch_input_area").input("\n".join(batch_numbers))
+            app.button(key="validate_batch").click()
+            timings['batch_ms'] = _timed_run(app)
+            timings['batch_rows'] = len(app.session_state['batch_results'])
+
+        timings['idle_rerun_ms'] = _timed_run(app)
+    except Exception as e:
+        timings['error'] = f"{type(e).__name__}: {str(e)}"
+
+    # Keep the session (and its results) alive until memory is measured
+    timings['_app'] = app
+    return timings
+
+
+def run_load_test(sessions=4, batch_size=1000, single_validations=3, dirty_ratio=0.1, seed=0, app_path=APP_PATH):
+    """
+    Run concurrent simulated sessions and summarize latency and memory
+
+    Args:
+        sessions (int): Number of concurrent sessions
+        batch_size (int): Numbers per batch submission (0 to skip the batch step)
+        single_validations (int): Single-number validations per session
+        dirty_ratio (float): Share of dirty inputs in the generated numbers
+        seed (int): Random seed for the generated numbers
+        app_path (str or Path): Streamlit script to load
+
+    Returns:
+        dict: {
+            'config': dict,
+            'latency_ms': dict (p50/p95/max per step),
+            'memory': dict (RSS before/after and per session),
+            'throughput_rows_per_sec': float,
+            'wall_seconds': float,
+            'errors': list
+        }
+    """
+    numbers = synthetic_numbers(sessions * (batch_size + single_validations), dirty_ratio=dirty_ratio, seed=seed)
+    per_session = batch_size + single_validations
+    barrier = threading.Barrier(sessions)
+    results = [None] * sessions
+
+    def worker(index):
+        chunk = numbers[index * per_session:(index + 1) * per_session]
+        results[index] = simulate_session(
+            index, chunk[single_validations:], chunk[:single_validations], barrier, app_path=app_path
+        )
+
+    _serialize_script_compiles()
+    # Warm-up run so shared imports are not charged to the sessions
+    AppTest.from_file(str(app_path), default_timeout=600).run()
+
+    rss_before = current_rss_bytes()
+    started = time.perf_counter()
+    threads = [threading.Thread(target=worker, args=(index,), name=f"session-{index}") for index in range(sessions)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall_seconds = time.perf_counter() - started
+    rss_after = current_rss_bytes()
+
+    def summarize(values):
+        return {
+            'p50': _percentile(values, 50),
+            'p95': _percentile(values, 95),
+            'max': max(values) if values else None,
+            'mean': statistics.fmean(values) if values else None,
+        }
+
+    latency = {
+        'cold_load': summarize([r['cold_load_ms'] for r in results if 'cold_load_ms' in r]),
+        'single_validation': summarize([ms for r in results for ms in r['single_ms']]),
+        'batch_time_to_results': summarize([r['batch_ms'] for r in results if 'batch_ms' in r]),
+        'idle_rerun': summarize([r['idle_rerun_ms'] for r in results if 'idle_rerun_ms' in r]),
+    }
+
+    batch_rows = sum(r.get('batch_rows', 0) for r in results)
+    rss_growth = (rss_after - rss_before) if rss_before is not None and rss_after is not None else None
+    report = {
+        'config': {
+            'sessions': sessions,
+            'batch_size': batch_size,
+            'single_validations': single_validations,
+            'dirty_ratio': dirty_ratio,
+            'seed': seed,
+        },
+        'latency_ms': latency,
+        'memory': {
+            'rss_before_mb': rss_before / 1e6 if rss_before is not None else None,
+            'rss_after_mb': rss_after / 1e6 if rss_after is not None else None,
+            'peak_rss_mb': (peak_rss_bytes() or 0) / 1e6,
+            'rss_per_session_mb': rss_growth / sessions / 1e6 if rss_growth is not None else None,
+        },
+        'throughput_rows_per_sec': batch_rows / wall_seconds if wall_seconds else 0.0,
+        'wall_seconds': wall_seconds,
+        'errors': [f"session {r['session_id']}: {r['error']}" for r in results if r['error']],
+    }
+
+    for r in results:
+        r.pop('_app', None)
+    return report
+
+
+def _format_ms(value):
+    return f"{value:9.1f}" if value is not None else "      n/a"
+
+
+def _main(argv=None):
+    parser = argparse.ArgumentParser(description="Concurrent-session load test for the Streamlit app")
+    parser.add_argument('--sessions', type=int, default=4, help="Concurrent sessions")
+    parser.add_argument('--batch-size', type=int, default=1000, help="Numbers per batch (0 to skip)")
+    parser.add_argument('--single', type=int, default=3, help="Single validations per session")
+    parser.add_argument('--dirty-ratio', type=float, default=0.1, help="Share of dirty inputs")
+    parser.add_argument('--seed', type=int, default=0, help="Random seed")
+    parser.add_argument('--app', default=str(APP_PATH), help="Streamlit script to test")
+    parser.add_argument('--json', default=None, help="Write the full report to this file")
+    args = parser.parse_args(argv)
+
+    report = run_load_test(
+        sessions=args.sessions,
+        batch_size=args.batch_size,
+        single_validations=args.single,
+        dirty_ratio=args.dirty_ratio,
+        seed=args.seed,
+        app_path=args.app,
+    )
+
+    print(f"Sessions: {args.sessions}  batch size: {args.batch_size}  single validations: {args.single}")
+    print(f"{'step':<24}{'p50 ms':>9}{'p95 ms':>9}{'max ms':>9}")
+    for step, stats in report['latency_ms'].items():
+        print(f"{step:<24}{_format_ms(stats['p50'])}{_format_ms(stats['p95'])}{_format_ms(stats['max'])}")
+
+    memory = report['memory']
+    if memory['rss_per_session_mb'] is not None:
+        print(f"RSS: {memory['rss_before_mb']:.1f} MB -> {memory['rss_after_mb']:.1f} MB "
+              f"({memory['rss_per_session_mb']:.1f} MB per session, peak {memory['peak_rss_mb']:.1f} MB)")
+    print(f"Batch throughput: {report['throughput_rows_per_sec']:,.0f} rows/s over {report['wall_seconds']:.1f}s")
+    for error in report['errors']:
+        print(f"ERROR {error}", file=sys.stderr)
+
+    if args.json:
+        with open(args.json, 'w') as handle:
+            json.dump(report, handle, indent=2)
+    return 1 if report['errors'] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(_main())
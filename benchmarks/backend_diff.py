@@ -0,0 +1,60 @@
+"""
+Validation Backend Differential Benchmark
+Runs two validation backends over the same corpus and reports how often they
+agree (per result field and per row), their timings and the speedup, plus the
+first disagreeing inputs so gaps in the faster backend can be inspected.
+
+Usage:
+    python -m benchmarks.backend_diff [--numbers 20000] [--input numbers.txt] [--baseline phonenumbers] [--candidate compiled] [--json report.json]
+"""
+
+import argparse
+import json
+import sys
+
+from benchmarks.corpus import synthetic_numbers
+from utils.validation_backends import BACKENDS, DEFAULT_BACKEND, compare_backends
+
+
+def _main(argv=None):
+    parser = argparse.ArgumentParser(description="Agreement rate and speedup between two validation backends")
+    parser.add_argument('--numbers', type=int, default=20000, help="Synthetic corpus size")
+    parser.add_argument('--input', default=None, help="Read inputs from this file (one per line) instead")
+    parser.add_argument('--baseline', default=DEFAULT_BACKEND, choices=list(BACKENDS), help="Reference backend")
+    parser.add_argument('--candidate', default="compiled", choices=list(BACKENDS), help="Backend under test")
+    parser.add_argument('--dirty-ratio', type=float, default=0.1, help="Share of dirty inputs")
+    parser.add_argument('--seed', type=int, default=0, help="Random seed")
+    parser.add_argument('--examples', type=int, default=10, help="Disagreements to show")
+    parser.add_argument('--json', default=None, help="Write the report to this file")
+    args = parser.parse_args(argv)
+
+    if args.input:
+        with open(args.input, encoding='utf-8') as handle:
+            numbers = [line.strip() for line in handle if line.strip()]
+    else:
+        numbers = synthetic_numbers(args.numbers, dirty_ratio=args.dirty_ratio, seed=args.seed)
+
+    report = compare_backends(numbers, args.baseline, args.candidate, examples=args.examples)
+
+    print(f"{args.candidate} vs {args.baseline} on {report['rows']:,} inputs")
+    print(f"  Rows agreeing on every field: {report['row_agreement_pct']:.2f}%")
+    for field, agreement in report['field_agreement_pct'].items():
+        print(f"    {field:<20}{agreement:>8.2f}%")
+    print(f"  {args.baseline}: {report['baseline_seconds']:.2f}s "
+          f"({report['rows'] / report['baseline_seconds']:,.0f} rows/s)")
+    print(f"  {args.candidate}: {report['candidate_seconds']:.2f}s "
+          f"({report['rows'] / report['candidate_seconds']:,.0f} rows/s)")
+    print(f"  Speedup: {report['speedup']:.2f}x")
+    if report['disagreements']:
+        print("\nFirst disagreements (baseline, candidate):")
+        for disagreement in report['disagreements']:
+            print(f"  {disagreement['input']}: {disagreement['fields']}")
+
+    if args.json:
+        with open(args.json, 'w') as handle:
+            json.dump(report, handle, indent=2, default=str)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(_main())
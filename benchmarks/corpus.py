@@ -0,0 +1,105 @@
+"""
+Synthetic Benchmark Corpus
+Reproducible phone number lists mixing valid numbers from common regions
+and non-geographic entities (e.g., +800 universal freephone) with the dirty
+inputs real uploads contain (unparseable text, too-short numbers, repeated
+dial codes, suspicious endings and toll-free numbers), plus valid numbers
+written with letters or an extension
+"""
+
+import random
+
+import phonenumbers
+
+CORPUS_REGIONS = [
+    "US", "GB", "DE", "FR", "IN", "AU", "BR", "CN", "JP", "MX",
+    "ES", "IT", "NL", "ZA", "AE", "SG", "CA", "KW", "NG", "PH",
+]
+
+# Share of inputs from non-geographic entities (+800, +882, ...)
+NON_GEO_RATIO = 0.02
+# Share of clean inputs written with keypad letters or an extension
+WRITTEN_FORM_RATIO = 0.03
+
+_KEYPAD_LETTERS = {
+    "2": "ABC", "3": "DEF", "4": "GHI", "5": "JKL",
+    "6": "MNO", "7": "PQRS", "8": "TUV", "9": "WXYZ",
+}
+
+
+def _example_numbers(region_codes):
+    examples = []
+    for region_code in region_codes:
+        for number_type in (phonenumbers.PhoneNumberType.MOBILE,
+                            phonenumbers.PhoneNumberType.FIXED_LINE,
+                            phonenumbers.PhoneNumberType.TOLL_FREE):
+            example = phonenumbers.example_number_for_type(region_code, number_type)
+            if example is not None:
+                examples.append(phonenumbers.format_number(example, phonenumbers.PhoneNumberFormat.E164))
+    return examples
+
+
+def _non_geo_examples():
+    examples = []
+    for country_code in sorted(phonenumbers.COUNTRY_CODES_FOR_NON_GEO_REGIONS):
+        example = phonenumbers.example_number_for_non_geo_entity(country_code)
+        if example is not None:
+            examples.append(phonenumbers.format_number(example, phonenumbers.PhoneNumberFormat.E164))
+    return examples
+
+
+def _vary(e164, rng):
+    """Randomize the last four digits so repeated examples stay distinct"""
+    return e164[:-4] + "".join(rng.choice("0123456789") for _ in range(4))
+
+
+def _dirty(e164, rng):
+    kind = rng.randrange(5)
+    if kind == 0:
+        return rng.choice(["n/a", "unknown", "call me", "-", "TBD"])
+    if kind == 1:
+        return e164[:rng.randint(3, 6)]  # too short
+    if kind == 2:
+        dial_code = str(phonenumbers.parse(e164).country_code)
+        return "+" + dial_code + e164[1:]  # repeated dial code
+    if kind == 3:
+        return e164[:-5] + rng.choice("0123456789") * 5  # suspicious ending
+    return e164 + "".join(rng.choice("0123456789") for _ in range(3))  # too long
+
+
+def _written_form(e164, rng):
+    """The same number spelled with keypad letters (e.g., +1-800-FLOWERS) or with an extension"""
+    if rng.random() < 0.5:
+        return f"{e164} ext {rng.randint(1, 9999)}"
+    head, tail = e164[:-7], e164[-7:]
+    return head + "-" + "".join(rng.choice(_KEYPAD_LETTERS.get(digit, digit)) for digit in tail)
+
+
+def synthetic_numbers(count, dirty_ratio=0.1, seed=0, region_codes=None):
+    """
+    Generate a reproducible list of phone number inputs
+
+    Args:
+        count (int): Number of inputs
+        dirty_ratio (float): Share of inputs (0-1) drawn from the dirty patterns
+        seed (int): Random seed
+        region_codes (list): Regions to draw valid numbers from (defaults to CORPUS_REGIONS)
+
+    Returns:
+        list: Phone number strings
+    """
+    rng = random.Random(seed)
+    examples = _example_numbers(region_codes or CORPUS_REGIONS)
+    non_geo_examples = _non_geo_examples()
+    numbers = []
+    for _ in range(count):
+        pool = non_geo_examples if rng.random() < NON_GEO_RATIO else examples
+        number = _vary(rng.choice(pool), rng)
+        if rng.random() < dirty_ratio:
+            number = _dirty(number, rng)
+        elif rng.random() < WRITTEN_FORM_RATIO:
+            number = _written_form(number, rng)
+        elif rng.random() < 0.3:
+            number = number.lstrip("+")  # '+' is optional in the app
+        numbers.append(number)
+    return numbers
@@ -0,0 +1,99 @@
+"""
+Fail-Fast Check Mode Benchmark
+Validates the same corpora in full-detail and fail-fast mode at several dirty
+ratios and reports CPU-time throughput, speedup, the share of rows that
+short-circuit, and whether the summary counts of both modes agree (they
+should: fail-fast only skips detail columns).
+
+Usage:
+    python -m benchmarks.fail_fast [--numbers 20000] [--dirty-ratios 0,0.1,0.3,0.6] [--backend phonenumbers] [--json report.json]
+"""
+
+import argparse
+import json
+import sys
+import time
+
+from benchmarks.corpus import synthetic_numbers
+from utils.phone_checker import FAIL_FAST, FULL_DETAIL, NOT_CHECKED, check_phone, preload_lookups
+from utils.validation_aggregates import ValidationAggregate
+from utils.validation_backends import BACKENDS, DEFAULT_BACKEND, get_backend
+
+
+def time_modes(numbers, backend, repeats=3):
+    """
+    Best-of-`repeats` CPU time to validate `numbers` in each mode
+
+    Runs of the two modes alternate so drift on a shared machine affects
+    both alike.
+
+    Returns:
+        dict: {mode: (seconds, result rows of the last run)}
+    """
+    timings = {}
+    for _ in range(repeats):
+        for mode in (FULL_DETAIL, FAIL_FAST):
+            started = time.process_time()
+            rows = [check_phone(phone, backend=backend, mode=mode) for phone in numbers]
+            elapsed = time.process_time() - started
+            best = timings[mode][0] if mode in timings else elapsed
+            timings[mode] = (min(best, elapsed), rows)
+    return timings
+
+
+def run_benchmark(count=20000, dirty_ratios=(0.0, 0.1, 0.3, 0.6), backend_name=DEFAULT_BACKEND, repeats=3, seed=0):
+    """
+    Compare both modes at each dirty ratio
+
+    Returns:
+        dict: {'backend': str, 'numbers': int, 'ratios': list (one dict per dirty ratio)}
+    """
+    backend = get_backend(backend_name)
+    preload_lookups(backend)
+    check_phone("+12125550100", backend=backend)  # load metadata before timing
+
+    ratios = []
+    for dirty_ratio in dirty_ratios:
+        numbers = synthetic_numbers(count, dirty_ratio=dirty_ratio, seed=seed)
+        timings = time_modes(numbers, backend, repeats)
+        full_seconds, full_rows = timings[FULL_DETAIL]
+        fast_seconds, fast_rows = timings[FAIL_FAST]
+        short_circuited = sum(row["country"] in (NOT_CHECKED, "Error") for row in fast_rows)
+        ratios.append({
+            'dirty_ratio': dirty_ratio,
+            'full_rows_per_sec': count / full_seconds,
+            'fail_fast_rows_per_sec': count / fast_seconds,
+            'speedup': full_seconds / fast_seconds,
+            'short_circuited_pct': round(100 * short_circuited / count, 2),
+            'summaries_match': (ValidationAggregate().add_rows(full_rows).summary()
+                                == ValidationAggregate().add_rows(fast_rows).summary()),
+        })
+    return {'backend': backend_name, 'numbers': count, 'ratios': ratios}
+
+
+def _main(argv=None):
+    parser = argparse.ArgumentParser(description="Throughput of fail-fast vs full-detail checks on dirty lists")
+    parser.add_argument('--numbers', type=int, default=20000, help="Corpus size per dirty ratio")
+    parser.add_argument('--dirty-ratios', default="0,0.1,0.3,0.6", help="Comma-separated shares of dirty inputs")
+    parser.add_argument('--backend', default=DEFAULT_BACKEND, choices=list(BACKENDS), help="Validation backend")
+    parser.add_argument('--repeats', type=int, default=3, help="Alternating runs per mode; the fastest is reported")
+    parser.add_argument('--seed', type=int, default=0, help="Random seed")
+    parser.add_argument('--json', default=None, help="Write the report to this file")
+    args = parser.parse_args(argv)
+
+    dirty_ratios = [float(ratio) for ratio in args.dirty_ratios.split(",")]
+    report = run_benchmark(args.numbers, dirty_ratios, args.backend, args.repeats, args.seed)
+    print(f"{report['numbers']:,} numbers per corpus, {report['backend']} backend")
+    print(f"{'Dirty':>7}{'Full rows/s':>14}{'Fail-fast rows/s':>18}{'Speedup':>9}{'Skipped':>9}{'Counts':>8}")
+    for stats in report['ratios']:
+        print(f"{stats['dirty_ratio']:>7.0%}{stats['full_rows_per_sec']:>14,.0f}{stats['fail_fast_rows_per_sec']:>18,.0f}"
+              f"{stats['speedup']:>8.2f}x{stats['short_circuited_pct']:>8.1f}%"
+              f"{'same' if stats['summaries_match'] else 'DIFF':>8}")
+    if args.json:
+        with open(args.json, 'w') as handle:
+            json.dump(report, handle, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(_main())
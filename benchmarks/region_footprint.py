@@ -0,0 +1,143 @@
+"""
+Region Allowlist Footprint Benchmark
+Compares a worker validating with every region against one restricted to a
+region allowlist. Each configuration runs in fresh subprocesses (the allowlist
+is set through PHONE_VALIDATOR_REGIONS, as for real workers) that import the
+checker, validate one number, then validate the whole corpus. Reports
+cold-start time to the first result, resident memory after the first result
+and after the corpus, peak RSS, throughput and rows fast-failed as outside the
+allowlist.
+
+Usage:
+    python -m benchmarks.region_footprint [--numbers 20000] [--regions US,GB,...] [--repeats 3] [--json report.json]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.corpus import CORPUS_REGIONS, synthetic_numbers
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+# Default allowlist: the 15 most common regions of the corpus
+DEFAULT_REGIONS = CORPUS_REGIONS[:15]
+
+
+def _measure(numbers_path):
+    """Child process body: print one JSON measurement line"""
+    started = time.perf_counter()
+    from utils.phone_checker import REGION_NOT_ALLOWED, check_phone
+    from utils.resource_usage import current_rss_bytes, peak_rss_bytes
+
+    with open(numbers_path, encoding='utf-8') as handle:
+        numbers = [line.strip() for line in handle if line.strip()]
+
+    check_phone(numbers[0])
+    cold_start = time.perf_counter() - started
+    rss_first = current_rss_bytes()
+
+    corpus_started = time.perf_counter()
+    not_allowed = sum(check_phone(phone)["country"] == REGION_NOT_ALLOWED for phone in numbers)
+    corpus_seconds = time.perf_counter() - corpus_started
+
+    print(json.dumps({
+        'cold_start_ms': cold_start * 1000,
+        'rss_first_mb': rss_first / 1e6,
+        'rss_final_mb': current_rss_bytes() / 1e6,
+        'peak_rss_mb': peak_rss_bytes() / 1e6,
+        'rows_per_sec': len(numbers) / corpus_seconds if corpus_seconds > 0 else 0.0,
+        'not_allowed': not_allowed,
+        'geocoder_loaded': 'phonenumbers.geocoder' in sys.modules,
+    }))
+
+
+def run_configuration(numbers_path, regions=None, repeats=3):
+    """
+    Measure one configuration in `repeats` fresh processes
+
+    Args:
+        numbers_path (str): File with one input per line
+        regions (list): Allowlist, or None for every region
+        repeats (int): Processes to run; medians are reported
+
+    Returns:
+        dict: Median of every measurement plus the allowlist used
+    """
+    env = dict(os.environ)
+    env.pop("PHONE_VALIDATOR_REGIONS", None)
+    if regions:
+        env["PHONE_VALIDATOR_REGIONS"] = ",".join(regions)
+
+    runs = []
+    for _ in range(repeats):
+        completed = subprocess.run(
+            [sys.executable, "-m", "benchmarks.region_footprint", "--child", numbers_path],
+            cwd=REPO_ROOT, env=env, capture_output=True, text=True, check=True
+        )
+        runs.append(json.loads(completed.stdout.strip().splitlines()[-1]))
+
+    report = {key: statistics.median(run[key] for run in runs)
+              for key in runs[0] if key not in ('not_allowed', 'geocoder_loaded')}
+    report['not_allowed'] = runs[0]['not_allowed']
+    report['geocoder_loaded'] = runs[0]['geocoder_loaded']
+    report['regions'] = list(regions) if regions else None
+    return report
+
+
+def run_benchmark(count=20000, regions=None, repeats=3, dirty_ratio=0.1, seed=0):
+    """
+    Compare the full and restricted configurations on the same corpus
+
+    Returns:
+        dict: {'numbers': int, 'full': dict, 'restricted': dict}
+    """
+    regions = regions or DEFAULT_REGIONS
+    numbers = synthetic_numbers(count, dirty_ratio=dirty_ratio, seed=seed)
+    with tempfile.NamedTemporaryFile('w', suffix=".txt", delete=False, encoding='utf-8') as handle:
+        handle.write("\n".join(numbers) + "\n")
+        numbers_path = handle.name
+    try:
+        return {
+            'numbers': count,
+            'full': run_configuration(numbers_path, None, repeats),
+            'restricted': run_configuration(numbers_path, regions, repeats),
+        }
+    finally:
+        os.remove(numbers_path)
+
+
+def _main(argv=None):
+    parser = argparse.ArgumentParser(description="Resident memory and cold start with and without a region allowlist")
+    parser.add_argument('--numbers', type=int, default=20000, help="Corpus size")
+    parser.add_argument('--regions', default=",".join(DEFAULT_REGIONS), help="Comma-separated allowlist")
+    parser.add_argument('--repeats', type=int, default=3, help="Processes per configuration")
+    parser.add_argument('--seed', type=int, default=0, help="Random seed")
+    parser.add_argument('--json', default=None, help="Write the report to this file")
+    parser.add_argument('--child', default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        _measure(args.child)
+        return 0
+
+    report = run_benchmark(args.numbers, args.regions.split(","), args.repeats, seed=args.seed)
+    print(f"Corpus: {report['numbers']:,} numbers; allowlist: {','.join(report['restricted']['regions'])}")
+    print(f"{'Config':<12}{'Cold ms':>10}{'RSS first':>11}{'RSS final':>11}{'Peak RSS':>10}{'Rows/s':>10}{'Not allowed':>13}")
+    for label in ('full', 'restricted'):
+        stats = report[label]
+        print(f"{label:<12}{stats['cold_start_ms']:>10.0f}{stats['rss_first_mb']:>9.1f}MB{stats['rss_final_mb']:>9.1f}MB"
+              f"{stats['peak_rss_mb']:>8.1f}MB{stats['rows_per_sec']:>10,.0f}{stats['not_allowed']:>13,}")
+    if args.json:
+        with open(args.json, 'w') as handle:
+            json.dump(report, handle, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(_main())
@@ -0,0 +1,222 @@
+"""
+Shared Worker Pool Benchmark
+Simulates one server under mixed load: heavy sessions validating large
+batches, light sessions submitting small batches shortly after, and an
+interactive user validating single numbers in the server process the whole
+time. Runs the load twice: every session validating in its own thread (each
+Streamlit session's script thread) and every session submitting chunks to one
+SharedWorkerPool. Reports light-batch completion time, heavy-batch completion
+time and single-number latency for both, plus the pool workers' resident
+memory when __main__ is the app script, as under `streamlit run`.
+
+Usage:
+    python -m benchmarks.shared_pool [--heavy 2] [--heavy-rows 40000] [--light 4] [--light-rows 1000] [--workers 2] [--json report.json]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import threading
+import time
+import types
+from pathlib import Path
+
+from benchmarks.corpus import synthetic_numbers
+from utils.phone_checker import check_phone, preload_lookups
+from utils.resource_usage import current_rss_bytes
+from utils.worker_pool import SharedWorkerPool, validate_numbers
+
+# Rows per submitted chunk, as the batch executor's first chunks
+CHUNK_ROWS = 500
+# Light sessions start this long after the heavy ones
+LIGHT_DELAY_SECONDS = 1.0
+# Pause between interactive single-number checks
+PROBE_INTERVAL_SECONDS = 0.02
+# Script `streamlit run` installs as __main__
+APP_PATH = Path(__file__).resolve().parent.parent / "Phone Validator.py"
+
+
+def _percentile(ordered, percent):
+    if not ordered:
+        return None
+    return ordered[min(len(ordered) - 1, int(round((len(ordered) - 1) * percent / 100)))]
+
+
+def _run_session(validate_chunk, numbers, delay, durations, index):
+    time.sleep(delay)
+    started = time.perf_counter()
+    for start in range(0, len(numbers), CHUNK_ROWS):
+        validate_chunk(numbers[start:start + CHUNK_ROWS])
+    durations[index] = time.perf_counter() - started
+
+
+def run_load(validate_for_session, heavy, heavy_rows, light, light_rows, seed=0):
+    """
+    Run heavy and light sessions plus an interactive probe
+
+    Args:
+        validate_for_session (callable): validate_for_session(session_id) -> chunk validator
+
+    Returns:
+        dict: Completion times per session kind and single-number latency
+    """
+    sessions = [(f"heavy-{index}", synthetic_numbers(heavy_rows, seed=seed + index), 0.0) for index in range(heavy)]
+    sessions += [(f"light-{index}", synthetic_numbers(light_rows, seed=seed + 100 + index), LIGHT_DELAY_SECONDS)
+                 for index in range(light)]
+    probes = synthetic_numbers(5000, seed=seed + 1000)
+
+    durations = [None] * len(sessions)
+    threads = [
+        threading.Thread(target=_run_session, args=(validate_for_session(session_id), numbers, delay, durations, index),
+                         name=session_id)
+        for index, (session_id, numbers, delay) in enumerate(sessions)
+    ]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+
+    latencies_ms = []
+    while any(thread.is_alive() for thread in threads):
+        probe_started = time.perf_counter()
+        check_phone(probes[len(latencies_ms) % len(probes)])
+        latencies_ms.append((time.perf_counter() - probe_started) * 1000)
+        time.sleep(PROBE_INTERVAL_SECONDS)
+    for thread in threads:
+        thread.join()
+
+    heavy_seconds, light_seconds = durations[:heavy], sorted(durations[heavy:])
+    latencies_ms.sort()
+    return {
+        'elapsed_seconds': time.perf_counter() - started,
+        'heavy_seconds_max': max(heavy_seconds) if heavy_seconds else None,
+        'light_seconds_median': statistics.median(light_seconds) if light_seconds else None,
+        'light_seconds_max': light_seconds[-1] if light_seconds else None,
+        'single_p50_ms': _percentile(latencies_ms, 50),
+        'single_p95_ms': _percentile(latencies_ms, 95),
+        'single_checks': len(latencies_ms),
+    }
+
+
+def _worker_memory(numbers):
+    """Worker task: validate, then report (pid, RSS bytes, whether Streamlit got imported)"""
+    validate_numbers(numbers)
+    return os.getpid(), current_rss_bytes(), "streamlit" in sys.modules
+
+
+def measure_worker_rss(workers=2, rows=2000, app_path=APP_PATH):
+    """
+    Resident memory of pool workers spawned while __main__ is the app script
+
+    Streamlit runs the page as a module named __main__ with __file__ set, which
+    is what a spawned worker would re-run as __mp_main__.
+
+    Returns:
+        dict: {
+            'workers_measured': int,
+            'worker_rss_mb_median': float,
+            'worker_rss_mb_max': float,
+            'page_loaded_in_worker': bool
+        }
+    """
+    # Workers unpickle tasks by module name, and __main__ is not theirs to import
+    from benchmarks.shared_pool import _worker_memory as worker_memory
+
+    app_main = types.ModuleType("__main__")
+    app_main.__file__ = str(app_path)
+    main = sys.modules["__main__"]
+    sys.modules["__main__"] = app_main
+    try:
+        pool = SharedWorkerPool(workers=workers)
+        try:
+            numbers = synthetic_numbers(rows)
+            futures = [pool.submit(f"memory-{index}", worker_memory, numbers) for index in range(workers * 4)]
+            readings = {}
+            page_loaded = False
+            for future in futures:
+                pid, rss, streamlit_loaded = future.result()
+                readings[pid] = max(readings.get(pid, 0), rss or 0)
+                page_loaded = page_loaded or streamlit_loaded
+        finally:
+            pool.shutdown()
+    finally:
+        sys.modules["__main__"] = main
+
+    rss_mb = sorted(rss / 1e6 for rss in readings.values())
+    return {
+        'workers_measured': len(rss_mb),
+        'worker_rss_mb_median': statistics.median(rss_mb),
+        'worker_rss_mb_max': rss_mb[-1],
+        'page_loaded_in_worker': page_loaded,
+    }
+
+
+def run_benchmark(heavy=2, heavy_rows=40000, light=4, light_rows=1000, workers=2, session_quota=None, seed=0):
+    """
+    Compare per-session threads with the shared pool under the same load
+
+    Returns:
+        dict: {'config': dict, 'threads': dict, 'pool': dict, 'worker_memory': dict}
+    """
+    preload_lookups()
+    check_phone("+12125550100")  # load metadata, as a running server has
+
+    threads_report = run_load(lambda session_id: validate_numbers, heavy, heavy_rows, light, light_rows, seed)
+
+    pool = SharedWorkerPool(workers=workers, session_quota=session_quota)
+    try:
+        pool.validate("warm-up", ["+12125550100"] * workers)  # spawn a worker before timing
+        pool_report = run_load(lambda session_id: lambda chunk: pool.validate(session_id, chunk),
+                               heavy, heavy_rows, light, light_rows, seed)
+    finally:
+        pool.shutdown()
+
+    return {
+        'config': {'heavy': heavy, 'heavy_rows': heavy_rows, 'light': light, 'light_rows': light_rows,
+                   'workers': pool.workers, 'session_quota': pool.session_quota},
+        'threads': threads_report,
+        'pool': pool_report,
+        'worker_memory': measure_worker_rss(workers),
+    }
+
+
+def _format(value, digits=1):
+    return "-" if value is None else f"{value:.{digits}f}"
+
+
+def _main(argv=None):
+    parser = argparse.ArgumentParser(description="Per-session threads vs one shared worker pool under mixed load")
+    parser.add_argument('--heavy', type=int, default=2, help="Sessions validating large batches")
+    parser.add_argument('--heavy-rows', type=int, default=40000, help="Rows per heavy batch")
+    parser.add_argument('--light', type=int, default=4, help="Sessions validating small batches")
+    parser.add_argument('--light-rows', type=int, default=1000, help="Rows per light batch")
+    parser.add_argument('--workers', type=int, default=2, help="Pool worker processes")
+    parser.add_argument('--session-quota', type=int, default=None, help="Running tasks per session")
+    parser.add_argument('--seed', type=int, default=0, help="Random seed")
+    parser.add_argument('--json', default=None, help="Write the report to this file")
+    args = parser.parse_args(argv)
+
+    report = run_benchmark(args.heavy, args.heavy_rows, args.light, args.light_rows,
+                           args.workers, args.session_quota, args.seed)
+    config = report['config']
+    print(f"{config['heavy']} x {config['heavy_rows']:,}-row and {config['light']} x {config['light_rows']:,}-row batches; "
+          f"pool of {config['workers']} workers, quota {config['session_quota']}")
+    print(f"{'Mode':<10}{'Light med s':>13}{'Light max s':>13}{'Heavy s':>10}{'Single p50 ms':>15}{'Single p95 ms':>15}")
+    for label in ('threads', 'pool'):
+        stats = report[label]
+        print(f"{label:<10}{_format(stats['light_seconds_median']):>13}{_format(stats['light_seconds_max']):>13}"
+              f"{_format(stats['heavy_seconds_max']):>10}{_format(stats['single_p50_ms'], 2):>15}"
+              f"{_format(stats['single_p95_ms'], 2):>15}")
+    memory = report['worker_memory']
+    print(f"Pool worker RSS under a Streamlit-like __main__: median {memory['worker_rss_mb_median']:.0f} MB, "
+          f"max {memory['worker_rss_mb_max']:.0f} MB over {memory['workers_measured']} workers; "
+          f"app page loaded in workers: {'yes' if memory['page_loaded_in_worker'] else 'no'}")
+    if args.json:
+        with open(args.json, 'w') as handle:
+            json.dump(report, handle, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(_main())
@@ -0,0 +1,101 @@
+"""
+As-You-Type Latency Benchmark
+Replays typing of synthetic numbers one keystroke at a time through the same
+path as the app's live validation fragment (minimum-digit check, then
+check_phone_cached) and reports server-side latency per keystroke. The first
+pass types every number fresh; the second retypes them, as when a user
+backspaces or another session enters a number already seen.
+
+Usage:
+    python -m benchmarks.typing_latency --numbers 200 [--target-ms 10] [--json report.json]
+"""
+
+import argparse
+import json
+import sys
+import time
+
+from benchmarks.corpus import synthetic_numbers
+from utils.phone_checker import check_phone_cached, preload_lookups
+
+# Mirrors LIVE_MIN_DIGITS in the app
+LIVE_MIN_DIGITS = 5
+
+
+def _percentile(ordered, percent):
+    if not ordered:
+        return None
+    return ordered[min(len(ordered) - 1, int(round((len(ordered) - 1) * percent / 100)))]
+
+
+def keystrokes(number):
+    """Every prefix a user produces while typing `number`"""
+    return [number[:end] for end in range(1, len(number) + 1)]
+
+
+def time_keystroke(text):
+    """Server-side work for one committed keystroke, in milliseconds"""
+    started = time.perf_counter()
+    if text.strip() and sum(character.isdigit() for character in text) >= LIVE_MIN_DIGITS:
+        check_phone_cached(text)
+    return (time.perf_counter() - started) * 1000
+
+
+def summarize(latencies_ms, target_ms):
+    ordered = sorted(latencies_ms)
+    return {
+        'keystrokes': len(ordered),
+        'p50_ms': _percentile(ordered, 50),
+        'p95_ms': _percentile(ordered, 95),
+        'p99_ms': _percentile(ordered, 99),
+        'max_ms': ordered[-1] if ordered else None,
+        'within_target_pct': round(100 * sum(value <= target_ms for value in ordered) / len(ordered), 2) if ordered else None,
+    }
+
+
+def run_benchmark(count=200, dirty_ratio=0.1, seed=0, target_ms=10.0):
+    """
+    Type `count` numbers twice and measure per-keystroke latency
+
+    Returns:
+        dict: {'target_ms': float, 'first_pass': dict, 'repeat_pass': dict}
+    """
+    numbers = synthetic_numbers(count, dirty_ratio=dirty_ratio, seed=seed)
+    # Load phonenumbers metadata once, as a running server already has
+    preload_lookups()
+    check_phone_cached("+12125550100")
+
+    report = {'target_ms': target_ms}
+    for label in ('first_pass', 'repeat_pass'):
+        latencies = [time_keystroke(text) for number in numbers for text in keystrokes(number)]
+        report[label] = summarize(latencies, target_ms)
+    return report
+
+
+def _format_ms(value):
+    return "-" if value is None else f"{value:.3f}"
+
+
+def _main(argv=None):
+    parser = argparse.ArgumentParser(description="Per-keystroke latency of as-you-type validation")
+    parser.add_argument('--numbers', type=int, default=200, help="Numbers typed per pass")
+    parser.add_argument('--dirty-ratio', type=float, default=0.1, help="Share of dirty inputs")
+    parser.add_argument('--seed', type=int, default=0, help="Random seed")
+    parser.add_argument('--target-ms', type=float, default=10.0, help="Latency target per keystroke")
+    parser.add_argument('--json', default=None, help="Write the report to this file")
+    args = parser.parse_args(argv)
+
+    report = run_benchmark(args.numbers, args.dirty_ratio, args.seed, args.target_ms)
+    print(f"{'Pass':<14}{'Keys':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}{'<= target':>11}")
+    for label in ('first_pass', 'repeat_pass'):
+        stats = report[label]
+        print(f"{label:<14}{stats['keystrokes']:>8}{_format_ms(stats['p50_ms']):>10}{_format_ms(stats['p95_ms']):>10}"
+              f"{_format_ms(stats['p99_ms']):>10}{_format_ms(stats['max_ms']):>10}{stats['within_target_pct']:>10}%")
+    if args.json:
+        with open(args.json, 'w') as handle:
+            json.dump(report, handle, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(_main())
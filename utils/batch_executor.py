@@ -0,0 +1,299 @@
+"""
+Memory-Budgeted Batch Executor
+Validates an iterable of phone numbers in chunks while staying under a memory
+budget. The first chunks are traced with tracemalloc to learn how much memory
+a result row keeps alive; after every chunk the executor checks RSS growth and
+throughput and resizes the next chunk to stay under budget while maximizing
+rows/sec. Once retained results would no longer fit, they are spilled to an
+NDJSON file on disk instead of failing.
+"""
+
+import csv
+import itertools
+import json
+import os
+import tempfile
+import time
+import tracemalloc
+
+from utils.duplicate_detection import flag_duplicates
+from utils.phone_checker import RESULT_FIELDS, check_phone, preload_lookups
+from utils.resource_usage import current_rss_bytes
+
+# Share of the budget a single chunk's working set may use
+CHUNK_BUDGET_FRACTION = 0.1
+# Grow only while throughput stays within this factor of the best seen
+THROUGHPUT_TOLERANCE = 0.9
+# Chunks traced to measure retained bytes per row; the first one also pays
+# for lazily loaded phonenumbers metadata, so the smallest reading wins
+CALIBRATION_CHUNKS = 2
+
+
+class BatchResult:
+    """
+    Results of a budgeted batch run, held in memory or spilled to disk
+
+    Rows always come back in input order, whichever way they are stored.
+    """
+
+    def __init__(self, spill_dir=None):
+        self.rows = []
+        self.spill_path = None
+        self.row_count = 0
+        self.stats = {}
+        self._spill_dir = spill_dir
+        self._spill_handle = None
+        self._csv_path = None
+
+    @property
+    def spilled(self):
+        """True when the results live in the spill file instead of memory"""
+        return self.spill_path is not None
+
+    def append_chunk(self, chunk_rows):
+        self.row_count += len(chunk_rows)
+        if self.spilled:
+            self._write_spill(chunk_rows)
+        else:
+            self.rows.extend(chunk_rows)
+
+    def spill(self):
+        """Move the rows held in memory to the spill file; later chunks go straight to disk"""
+        if self.spilled:
+            return
+        handle, path = tempfile.mkstemp(prefix="phone_batch_", suffix=".ndjson", dir=self._spill_dir)
+        self.spill_path = path
+        self._spill_handle = os.fdopen(handle, 'w', encoding='utf-8')
+        self._write_spill(self.rows)
+        self.rows = []
+
+    def _write_spill(self, rows):
+        self._spill_handle.writelines(json.dumps(row) + "\n" for row in rows)
+
+    def close(self):
+        """Flush the spill file, if any"""
+        if self._spill_handle is not None:
+            self._spill_handle.close()
+            self._spill_handle = None
+
+    def iter_rows(self):
+        """Yield every result row in input order"""
+        if not self.spilled:
+            yield from self.rows
+            return
+        self.close()
+        with open(self.spill_path, encoding='utf-8') as handle:
+            for line in handle:
+                yield json.loads(line)
+
+    def head(self, count):
+        """Get the first `count` rows without loading the rest"""
+        return list(itertools.islice(self.iter_rows(), count))
+
+    def write_csv(self, path):
+        """Stream all rows to a CSV file with the app's export quoting"""
+        with open(path, 'w', encoding='utf-8', newline='') as handle:
+            writer = None
+            for row in self.iter_rows():
+                if writer is None:
+                    fieldnames = RESULT_FIELDS + [key for key in row if key not in RESULT_FIELDS]
+                    writer = csv.DictWriter(handle, fieldnames=fieldnames, quoting=csv.QUOTE_NONNUMERIC)
+                    writer.writeheader()
+                writer.writerow(row)
+
+    def export_csv(self):
+        """Write the CSV export next to the spill file once and return its path"""
+        if self._csv_path is None:
+            self._csv_path = self.spill_path + ".csv"
+            self.write_csv(self._csv_path)
+        return self._csv_path
+
+    def to_dataframe(self):
+        """Materialize all rows as a DataFrame (loads spilled rows into memory)"""
+        import pandas as pd
+
+        return pd.DataFrame(self.iter_rows())
+
+    def export_parts(self, path, max_bytes, header_lines=0):
+        """
+        Split an export file into line-aligned byte ranges of about max_bytes each
+
+        Lets a spilled export be downloaded in parts, so serving one part never
+        loads more than about max_bytes into memory.
+
+        Args:
+            path (str): Export file (e.g., export_csv() or spill_path)
+            max_bytes (int): Target part size
+            header_lines (int): Leading lines repeated at the top of every part
+
+        Returns:
+            list: (start, end) byte offsets, header excluded; pass each to read_part
+        """
+        self.close()
+        size = os.path.getsize(path)
+        parts = []
+        with open(path, 'rb') as handle:
+            for _ in range(header_lines):
+                handle.readline()
+            start = handle.tell()
+            while start < size:
+                handle.seek(min(size, start + max(1, max_bytes)))
+                handle.readline()  # finish the line the boundary lands in
+                end = min(size, handle.tell())
+                parts.append((start, end))
+                start = end
+        return parts
+
+    @staticmethod
+    def read_part(path, start, end, header_lines=0):
+        """Read one export_parts range, preceded by the file's header lines"""
+        with open(path, 'rb') as handle:
+            header = b"".join(handle.readline() for _ in range(header_lines))
+            handle.seek(start)
+            return header + handle.read(end - start)
+
+    def discard(self):
+        """Delete the spill file and its CSV export"""
+        self.close()
+        for path in (self.spill_path, self._csv_path):
+            if path and os.path.exists(path):
+                os.remove(path)
+
+
+def _next_chunk_size(chunk_size, chunk_bytes, chunk_budget, throughput, best_throughput,
+                     min_chunk_size, max_chunk_size):
+    """Multiplicative resize: back off on memory pressure or slowdown, grow otherwise"""
+    if chunk_bytes > chunk_budget:
+        chunk_size = int(chunk_size * max(0.25, chunk_budget / chunk_bytes))
+    elif throughput < best_throughput * THROUGHPUT_TOLERANCE:
+        chunk_size = int(chunk_size * 0.75)
+    elif chunk_bytes * 2 <= chunk_budget:
+        chunk_size *= 2
+    return max(min_chunk_size, min(max_chunk_size, chunk_size))
+
+
+def run_batch(numbers, memory_budget_mb=256, check=check_phone, initial_chunk_size=500,
+              min_chunk_size=50, max_chunk_size=50000, spill_dir=None, progress=None,
+              aggregate=None, duplicate_tracker=None, validate_chunk=None, export_copies=0,
+              preload=preload_lookups):
+    """
+    Validate phone numbers in adaptively sized chunks under a memory budget
+
+    Args:
+        numbers (iterable): Phone number strings; consumed lazily
+        memory_budget_mb (float): Memory the batch may add on top of the process baseline
+        check (callable): Per-number checker returning a result dict
+        initial_chunk_size (int): Rows in the first (calibration) chunk
+        min_chunk_size (int): Smallest chunk the executor shrinks to
+        max_chunk_size (int): Largest chunk the executor grows to
+        spill_dir (str): Directory for the spill file (defaults to the system temp dir)
+        progress (callable): Called as progress(rows_done, chunk_stats) after each chunk
+        aggregate (ValidationAggregate): Updated with every chunk's rows as they are produced
+        duplicate_tracker (DuplicateTracker): When given, rows get is_duplicate_row and
+            first_seen_index flags resolved against every earlier chunk
+        validate_chunk (callable): validate_chunk(numbers) -> result rows; replaces
+            per-number `check` calls, e.g. to run chunks on a SharedWorkerPool
+        export_copies (float): Copies of the retained rows the caller will build
+            on top of them (e.g., a download blob); counted against the budget,
+            so the rows spill while there is still room for the copies
+        preload (callable): Loads lazily imported lookup tables before the first
+            traced chunk when checks run in this process (None skips); imports
+            under tracemalloc are very slow
+
+    Returns:
+        BatchResult: Rows in input order plus run statistics in `.stats`
+    """
+    if preload is not None and validate_chunk is None:
+        preload()
+
+    budget_bytes = memory_budget_mb * 1024 * 1024
+    chunk_budget = budget_bytes * CHUNK_BUDGET_FRACTION
+    baseline_rss = current_rss_bytes()
+    result = BatchResult(spill_dir=spill_dir)
+
+    iterator = iter(numbers)
+    chunk_size = max(min_chunk_size, min(max_chunk_size, initial_chunk_size))
+    bytes_per_row = None
+    calibration_readings = []
+    best_throughput = 0.0
+    peak_growth = 0
+    chunk_count = 0
+    started = time.perf_counter()
+
+    while True:
+        chunk = list(itertools.islice(iterator, chunk_size))
+        if not chunk:
+            break
+
+        calibrating = len(calibration_readings) < CALIBRATION_CHUNKS
+        if calibrating:
+            was_tracing = tracemalloc.is_tracing()
+            if not was_tracing:
+                tracemalloc.start()
+            traced_before = tracemalloc.get_traced_memory()[0]
+
+        chunk_started = time.perf_counter()
+        chunk_rows = validate_chunk(chunk) if validate_chunk else [check(phone) for phone in chunk]
+        if duplicate_tracker is not None:
+            flag_duplicates(chunk_rows, duplicate_tracker)
+        chunk_seconds = time.perf_counter() - chunk_started
+
+        if calibrating:
+            traced_growth = tracemalloc.get_traced_memory()[0] - traced_before
+            if not was_tracing:
+                tracemalloc.stop()
+            calibration_readings.append(max(1, traced_growth / len(chunk_rows)))
+            bytes_per_row = min(calibration_readings)
+
+        rss = current_rss_bytes()
+        rss_growth = (rss - baseline_rss) if rss is not None and baseline_rss is not None else 0
+        chunk_bytes = max(bytes_per_row * len(chunk_rows), rss_growth - peak_growth)
+        peak_growth = max(peak_growth, rss_growth)
+
+        # Keep the chunk in memory only if the retained rows still fit the budget
+        retained_bytes = bytes_per_row * (len(result.rows) + len(chunk_rows)) * (1 + export_copies)
+        if not result.spilled and (retained_bytes > budget_bytes - chunk_budget or rss_growth > budget_bytes):
+            result.spill()
+        result.append_chunk(chunk_rows)
+        if aggregate is not None:
+            aggregate.add_rows(chunk_rows)
+        chunk_count += 1
+
+        # Tracing slows the calibration chunk down, so it does not set the bar
+        throughput = len(chunk_rows) / chunk_seconds if chunk_seconds > 0 else float('inf')
+        if not calibrating:
+            best_throughput = max(best_throughput, throughput)
+
+        chunk_stats = {
+            'chunk': chunk_count,
+            'rows': len(chunk_rows),
+            'rows_per_sec': throughput,
+            'rss_growth_mb': rss_growth / 1e6,
+            'bytes_per_row': bytes_per_row,
+            'spilled': result.spilled,
+        }
+        if progress:
+            progress(result.row_count, chunk_stats)
+
+        chunk_size = _next_chunk_size(
+            chunk_size, chunk_bytes, chunk_budget, throughput, best_throughput,
+            min_chunk_size, max_chunk_size
+        )
+
+    result.close()
+    elapsed = time.perf_counter() - started
+    result.stats = {
+        'rows': result.row_count,
+        'chunks': chunk_count,
+        'final_chunk_size': chunk_size,
+        'rows_per_sec': result.row_count / elapsed if elapsed > 0 else 0.0,
+        'bytes_per_row': bytes_per_row,
+        'peak_rss_growth_mb': peak_growth / 1e6,
+        'spilled': result.spilled,
+        'spill_path': result.spill_path,
+        'elapsed_seconds': elapsed,
+    }
+    if duplicate_tracker is not None:
+        result.stats['distinct_numbers'] = duplicate_tracker.distinct_count
+        result.stats['duplicate_index_mb'] = duplicate_tracker.memory_bytes / 1e6
+    return result
@@ -0,0 +1,292 @@
+"""
+Delta Revalidation
+Revalidates only what changed between a previous validation export and a new
+input list. Previous rows are hash-joined on the normalized 'original' input;
+rows that are new, that were produced under a different rules version, or
+that carry no rules version at all are run through the checker again, and
+everything else is reused as-is. A full-detail run never reuses fail-fast
+rows: their version differs, and unversioned rows with skipped fields are
+revalidated even when unversioned rows are trusted.
+
+Usage:
+    python -m utils.delta_revalidation PREVIOUS NEW --output merged.csv [--report changes.csv] [--trust-unversioned]
+"""
+
+import argparse
+import csv
+import sys
+import time
+from pathlib import Path
+
+import pandas as pd
+
+from utils.phone_checker import (
+    FULL_DETAIL,
+    NOT_CHECKED,
+    RESULT_FIELDS,
+    SKIPPED_FIELDS,
+    VERSION_FIELD,
+    check_phone,
+    get_checker_version,
+    normalize_phone_input,
+)
+
+# Result fields that are booleans (is_valid_length may also be unknown/None)
+BOOLEAN_FIELDS = ["is_valid", "is_valid_length", "has_duplicate_code", "is_suspicious", "is_tollfree"]
+INTEGER_FIELDS = ["actual_length"]
+OPTIONAL_FIELDS = ["tollfree_prefix", "tollfree_type"]
+
+
+def _coerce_boolean(value):
+    if isinstance(value, bool) or value is None:
+        return value
+    text = str(value).strip().lower()
+    if text in ("true", "1"):
+        return True
+    if text in ("false", "0"):
+        return False
+    return None
+
+
+def _coerce_integer(value):
+    try:
+        return int(float(value))
+    except (TypeError, ValueError):
+        return 0
+
+
+def _coerce_optional(value):
+    if value is None or (isinstance(value, float) and pd.isna(value)) or value == "":
+        return None
+    return str(value)
+
+
+def read_table(source):
+    """
+    Read a CSV, JSON or Parquet file as untyped records
+
+    Args:
+        source (str, Path or file-like): File to read; the format comes from the
+            extension of the path, or of the ``name`` of an uploaded file
+
+    Returns:
+        pd.DataFrame: Table with string/object columns
+    """
+    suffix = Path(getattr(source, 'name', str(source))).suffix.lower()
+    if suffix == ".csv":
+        return pd.read_csv(source, dtype=str, keep_default_na=False)
+    if suffix == ".json":
+        return pd.read_json(source, orient='records', dtype=False)
+    if suffix == ".parquet":
+        return pd.read_parquet(source)
+    raise ValueError(f"Unsupported file format '{suffix}' (expected .csv, .json or .parquet)")
+
+
+def load_results(source):
+    """
+    Load a previous validation export and restore the result column types
+
+    Args:
+        source (str, Path or file-like): CSV, JSON or Parquet export with at least 'original'
+
+    Returns:
+        list: Result rows as dicts
+
+    Raises:
+        ValueError: If the export has no 'original' column
+    """
+    table = read_table(source)
+    if "original" not in table.columns:
+        raise ValueError(f"{getattr(source, 'name', source)} has no 'original' column; is it a validation export?")
+
+    rows = table.to_dict('records')
+    for row in rows:
+        for field in BOOLEAN_FIELDS:
+            if field in row:
+                row[field] = _coerce_boolean(row[field])
+        for field in INTEGER_FIELDS:
+            if field in row:
+                row[field] = _coerce_integer(row[field])
+        for field in OPTIONAL_FIELDS:
+            if field in row:
+                row[field] = _coerce_optional(row[field])
+        if VERSION_FIELD in row:
+            row[VERSION_FIELD] = _coerce_optional(row[VERSION_FIELD])
+        row["original"] = str(row["original"])
+    return rows
+
+
+def read_numbers(path):
+    """
+    Read the new input list
+
+    Plain text files hold one number per line; tabular files use their
+    'original' column, or 'phone' / the first column when that is missing.
+
+    Args:
+        path (str or Path): Input file
+
+    Returns:
+        list: Phone number strings, blank entries skipped
+    """
+    path = Path(path)
+    if path.suffix.lower() in (".csv", ".json", ".parquet"):
+        table = read_table(path)
+        for column in ("original", "phone", table.columns[0]):
+            if column in table.columns:
+                values = table[column].astype(str).tolist()
+                break
+    else:
+        with open(path, encoding='utf-8') as handle:
+            values = handle.read().split('\n')
+    return [value.strip() for value in values if value.strip()]
+
+
+def write_results(rows, path, columns=None):
+    """
+    Write result rows to CSV, JSON or Parquet (chosen by extension)
+
+    CSV output uses the same quoting as the app's download button.
+    """
+    path = Path(path)
+    frame = pd.DataFrame(rows, columns=columns)
+    suffix = path.suffix.lower()
+    if suffix == ".csv":
+        frame.to_csv(path, index=False, quoting=csv.QUOTE_NONNUMERIC)
+    elif suffix == ".json":
+        frame.to_json(path, orient='records', indent=2)
+    elif suffix == ".parquet":
+        frame.to_parquet(path, index=False)
+    else:
+        raise ValueError(f"Unsupported file format '{suffix}' (expected .csv, .json or .parquet)")
+
+
+def _is_fail_fast_row(row):
+    """True for a row whose enrichment a fail-fast check skipped"""
+    return any(row.get(field) == NOT_CHECKED for field in SKIPPED_FIELDS)
+
+
+def _changed_fields(old_row, new_row):
+    return [
+        field for field in RESULT_FIELDS
+        if field in old_row and old_row[field] != new_row[field]
+    ]
+
+
+def revalidate_delta(previous_rows, numbers, check=check_phone, trust_unversioned=False, backend=None,
+                     mode=FULL_DETAIL):
+    """
+    Merge a previous result set with a new input list, validating only the delta
+
+    Args:
+        previous_rows (list): Result dicts from a previous run (see load_results)
+        numbers (list): New input phone numbers, in output order
+        check (callable): Per-number checker returning a result dict
+        trust_unversioned (bool): Reuse previous rows that carry no rules version
+            (e.g., exports made before the column existed) instead of revalidating
+            them; in full-detail mode, unversioned fail-fast rows are still revalidated
+        backend (ValidationBackend): Backend `check` validates with, for the
+            version stamp (defaults to get_backend())
+        mode (str): Check mode `check` validates with, for the version stamp
+
+    Returns:
+        dict: {
+            'results': list (merged result rows in input order, with rules_version),
+            'changes': list (one dict per added/removed/changed/refreshed number),
+            'summary': dict (counts per change type plus totals)
+        }
+    """
+    current_version = get_checker_version(backend, mode)
+
+    previous_by_key = {}
+    for row in previous_rows:
+        previous_by_key.setdefault(row["original"], row)
+
+    results = []
+    changes = []
+    validated = {}
+    seen_keys = set()
+    counts = {"reused": 0, "added": 0, "changed": 0, "refreshed": 0, "removed": 0}
+
+    for number in numbers:
+        key = normalize_phone_input(number)
+        seen_keys.add(key)
+
+        if key in validated:
+            results.append(dict(validated[key]))
+            continue
+
+        previous = previous_by_key.get(key)
+        version = previous.get(VERSION_FIELD) if previous else None
+        is_current = previous is not None and (
+            version == current_version
+            or (version is None and trust_unversioned
+                and not (mode == FULL_DETAIL and _is_fail_fast_row(previous)))
+        )
+
+        if is_current:
+            row = {field: previous.get(field) for field in RESULT_FIELDS}
+            row[VERSION_FIELD] = current_version
+            counts["reused"] += 1
+        else:
+            row = dict(check(number))
+            row[VERSION_FIELD] = current_version
+            if previous is None:
+                counts["added"] += 1
+                changes.append({"original": key, "change": "added", "fields_changed": ""})
+            else:
+                fields_changed = _changed_fields(previous, row)
+                change = "changed" if fields_changed else "refreshed"
+                counts[change] += 1
+                changes.append({"original": key, "change": change, "fields_changed": ", ".join(fields_changed)})
+
+        validated[key] = row
+        results.append(row)
+
+    for key in previous_by_key:
+        if key not in seen_keys:
+            counts["removed"] += 1
+            changes.append({"original": key, "change": "removed", "fields_changed": ""})
+
+    summary = dict(counts)
+    summary["total"] = len(results)
+    summary["validated"] = counts["added"] + counts["changed"] + counts["refreshed"]
+    summary["rules_version"] = current_version
+
+    return {
+        'results': results,
+        'changes': changes,
+        'summary': summary
+    }
+
+
+def _main(argv=None):
+    parser = argparse.ArgumentParser(description="Revalidate only the rows that changed since a previous export")
+    parser.add_argument('previous', help="Previous export (.csv, .json or .parquet)")
+    parser.add_argument('new_input', help="New input list (.txt one per line, or .csv/.json/.parquet)")
+    parser.add_argument('--output', required=True, help="Merged result file")
+    parser.add_argument('--report', default=None, help="Change report file (.csv, .json or .parquet)")
+    parser.add_argument('--trust-unversioned', action='store_true',
+                        help="Reuse previous rows that carry no rules_version column instead of revalidating them")
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    previous_rows = load_results(args.previous)
+    numbers = read_numbers(args.new_input)
+    delta = revalidate_delta(previous_rows, numbers, trust_unversioned=args.trust_unversioned)
+
+    write_results(delta['results'], args.output, columns=RESULT_FIELDS + [VERSION_FIELD])
+    if args.report:
+        write_results(delta['changes'], args.report, columns=["original", "change", "fields_changed"])
+
+    summary = delta['summary']
+    elapsed = time.perf_counter() - started
+    print(f"Rows: {summary['total']:,}  validated: {summary['validated']:,}  reused: {summary['reused']:,}")
+    print(f"Added: {summary['added']:,}  changed: {summary['changed']:,}  "
+          f"refreshed: {summary['refreshed']:,}  removed: {summary['removed']:,}")
+    print(f"Rules version: {summary['rules_version']}  elapsed: {elapsed:.2f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(_main())
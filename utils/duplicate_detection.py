@@ -0,0 +1,175 @@
+"""
+Duplicate Number Detection
+Flags rows whose E.164 number already appeared earlier in the list, using a
+compact hashed representation instead of a set of strings. Every number is
+reduced to a 64-bit hash (pandas' vectorized SipHash, stable across
+processes); the tracker keeps sorted NumPy arrays of seen hashes plus the
+index where each was first seen - 16 bytes per distinct number. Chunks are
+resolved with sort/searchsorted, so lists can be processed chunk by chunk or
+shard by shard in any number of workers.
+
+With 64-bit hashes the chance of any false duplicate stays below 0.03% even
+at 100M distinct numbers.
+"""
+
+import numpy as np
+import pandas as pd
+
+DUPLICATE_FIELDS = ["is_duplicate_row", "first_seen_index"]
+
+
+def hash_numbers(values):
+    """
+    Hash phone numbers to 64-bit integers
+
+    Args:
+        values (list): E.164 strings (any strings are accepted)
+
+    Returns:
+        np.ndarray: uint64 hashes, one per value
+    """
+    return pd.util.hash_array(np.asarray(values, dtype=object), categorize=False)
+
+
+def _dedupe_sorted(hashes, first_index):
+    """Sort by (hash, first index) and keep the earliest entry per hash"""
+    order = np.lexsort((first_index, hashes))
+    hashes, first_index = hashes[order], first_index[order]
+    keep = np.empty(len(hashes), dtype=bool)
+    if len(hashes):
+        keep[0] = True
+        np.not_equal(hashes[1:], hashes[:-1], out=keep[1:])
+    return hashes[keep], first_index[keep]
+
+
+class DuplicateTracker:
+    """
+    Seen-number index for detecting repeats across chunks
+
+    Seen hashes live in a few sorted runs of geometrically decreasing size;
+    a new chunk's distinct hashes become a run and similar-sized runs are
+    merged, so each hash is re-sorted O(log n) times rather than copied on
+    every chunk.
+
+    Rows get global 0-based indices in the order they are processed, unless
+    explicit indices are passed (e.g., when shards are resolved out of order).
+    """
+
+    def __init__(self):
+        self._runs = []  # [(sorted uint64 hashes, int64 first indices)], largest first
+        self.rows_seen = 0
+
+    @property
+    def distinct_count(self):
+        """Number of distinct numbers seen so far"""
+        return sum(len(hashes) for hashes, _ in self._runs)
+
+    @property
+    def memory_bytes(self):
+        """Bytes held by the index arrays"""
+        return sum(hashes.nbytes + first_index.nbytes for hashes, first_index in self._runs)
+
+    def _add_run(self, hashes, first_index):
+        self._runs.append((hashes, first_index))
+        while len(self._runs) > 1 and len(self._runs[-2][0]) <= 2 * len(self._runs[-1][0]):
+            newer_hashes, newer_first = self._runs.pop()
+            older_hashes, older_first = self._runs.pop()
+            self._runs.append(_dedupe_sorted(
+                np.concatenate([older_hashes, newer_hashes]),
+                np.concatenate([older_first, newer_first])
+            ))
+
+    def process_hashes(self, hashes, indices=None):
+        """
+        Resolve a chunk of pre-computed hashes against everything seen so far
+
+        Args:
+            hashes (np.ndarray): uint64 hashes (see hash_numbers)
+            indices (np.ndarray): Global row indices; defaults to the next
+                len(hashes) indices after the rows already processed
+
+        Returns:
+            tuple: (is_duplicate_row bool array, first_seen_index int64 array)
+        """
+        hashes = np.asarray(hashes, dtype=np.uint64)
+        count = len(hashes)
+        if indices is None:
+            indices = np.arange(self.rows_seen, self.rows_seen + count, dtype=np.int64)
+        else:
+            indices = np.asarray(indices, dtype=np.int64)
+        self.rows_seen += count
+        if count == 0:
+            return np.zeros(0, dtype=bool), np.zeros(0, dtype=np.int64)
+
+        # Group equal hashes inside the chunk; the lowest index leads each group
+        order = np.lexsort((indices, hashes))
+        sorted_hashes = hashes[order]
+        group_starts = np.empty(count, dtype=bool)
+        group_starts[0] = True
+        np.not_equal(sorted_hashes[1:], sorted_hashes[:-1], out=group_starts[1:])
+        group_ids = np.cumsum(group_starts) - 1
+        unique_hashes = sorted_hashes[group_starts]
+        group_first = indices[order][group_starts]
+
+        # Look the groups up in every run
+        found = np.zeros(len(unique_hashes), dtype=bool)
+        for run_hashes, run_first in self._runs:
+            positions = np.minimum(np.searchsorted(run_hashes, unique_hashes), len(run_hashes) - 1)
+            in_run = run_hashes[positions] == unique_hashes
+            if in_run.any():
+                hit_positions = positions[in_run]
+                earliest = np.minimum(run_first[hit_positions], group_first[in_run])
+                # An out-of-order chunk may hold an earlier first occurrence
+                run_first[hit_positions] = earliest
+                group_first[in_run] = earliest
+                found |= in_run
+
+        first_seen = np.empty(count, dtype=np.int64)
+        first_seen[order] = group_first[group_ids]
+
+        new = ~found
+        if new.any():
+            self._add_run(unique_hashes[new], group_first[new])
+
+        return first_seen != indices, first_seen
+
+    def process(self, values, indices=None):
+        """Hash a chunk of E.164 strings and resolve it (see process_hashes)"""
+        return self.process_hashes(hash_numbers(values), indices)
+
+    def merge(self, other):
+        """
+        Fold another tracker's index into this one, keeping the earliest first index
+
+        Useful when workers index disjoint global ranges; rows they already
+        flagged are not revisited, so resolve flags after the merge when
+        first occurrences may live in another worker's range.
+        """
+        runs = self._runs + other._runs
+        if runs:
+            self._runs = [_dedupe_sorted(
+                np.concatenate([hashes for hashes, _ in runs]),
+                np.concatenate([first_index for _, first_index in runs])
+            )]
+        self.rows_seen += other.rows_seen
+        return self
+
+
+def flag_duplicates(rows, tracker=None):
+    """
+    Add is_duplicate_row and first_seen_index to result rows, in place
+
+    Args:
+        rows (list): Result dicts with an 'e164' key, in list order
+        tracker (DuplicateTracker): Carries state across chunks; a fresh one
+            treats `rows` as the whole list
+
+    Returns:
+        list: The same rows
+    """
+    tracker = tracker if tracker is not None else DuplicateTracker()
+    is_duplicate, first_seen = tracker.process([row["e164"] for row in rows])
+    for row, duplicate, first in zip(rows, is_duplicate.tolist(), first_seen.tolist()):
+        row["is_duplicate_row"] = duplicate
+        row["first_seen_index"] = first
+    return rows
@@ -0,0 +1,450 @@
+"""
+Validation Metadata Snapshot
+Compiles dial codes, length rules, region names, number patterns (general,
+toll-free and every valid number type), leading digits, national prefixes and
+dial-code prefix tables into one versioned binary file. Processes using the
+compiled validation backend mmap the file read-only, so every process on a
+host shares the same pages through the OS page cache. Reading the snapshot
+(including the staleness check) imports neither phonenumbers nor the rule
+tables; only building it does. The default phonenumbers backend does not use
+the snapshot.
+
+Build:
+    python -m utils.metadata_snapshot build [--output PATH]
+
+Inspect:
+    python -m utils.metadata_snapshot info [--path PATH] [--region AU]
+"""
+
+import argparse
+import hashlib
+import importlib.metadata
+import mmap
+import os
+import re
+import struct
+import sys
+import time
+from functools import lru_cache
+from pathlib import Path
+
+SNAPSHOT_MAGIC = b"PVSNAP"
+SNAPSHOT_FORMAT_VERSION = 3
+DEFAULT_SNAPSHOT_PATH = Path(__file__).parent / "validation_metadata.snap"
+# Source of the length, dial code and toll-free override tables
+RULES_SOURCE_PATH = Path(__file__).parent / "phone_length_validator.py"
+
+# Header: magic, format version, region count, dial index count,
+# rules version, phonenumbers version, source fingerprint, string pool offset
+_HEADER = struct.Struct("<6sHII16s16s16sI")
+
+# Region record: region code, dial code, flags, min length, max length,
+# then (offset, length) pairs into the string pool for the region name,
+# toll-free pattern, general pattern, toll-free prefix override, national prefix,
+# valid pattern (any specific number type) and leading digits
+_STRING_FIELDS = (
+    'name', 'tollfree_pattern', 'general_pattern', 'tollfree_prefix',
+    'national_prefix', 'valid_pattern', 'leading_digits',
+)
+
+# Number type descriptions a valid number must match one of
+_NUMBER_TYPE_DESCS = (
+    'fixed_line', 'mobile', 'toll_free', 'premium_rate', 'shared_cost',
+    'personal_number', 'voip', 'pager', 'uan', 'voicemail',
+)
+_REGION = struct.Struct("<2sHBBB" + "IH" * len(_STRING_FIELDS))
+
+# Dial index record: dial code, region record index
+_DIAL = struct.Struct("<HH")
+
+FLAG_HAS_LENGTH_RULE = 0x01
+FLAG_HAS_DIAL_RULE = 0x02
+FLAG_MAIN_REGION = 0x04
+
+
+def source_fingerprint():
+    """
+    Fingerprint of the inputs a snapshot is built from, without importing them
+
+    Covers the rule table source file and the installed phonenumbers release,
+    read from package metadata.
+
+    Returns:
+        str: 16-character hex fingerprint
+    """
+    digest = hashlib.sha1(RULES_SOURCE_PATH.read_bytes())
+    digest.update(importlib.metadata.version("phonenumbers").encode('ascii'))
+    return digest.hexdigest()[:16]
+
+
+def _region_name(region_code):
+    """Resolve a display name for a region, empty if pycountry has none"""
+    import pycountry
+
+    try:
+        country_obj = pycountry.countries.get(alpha_2=region_code)
+        return country_obj.name if country_obj else ""
+    except Exception:
+        return ""
+
+
+def _collect_regions():
+    """Gather one record per region from the rule tables and phonenumbers metadata"""
+    import phonenumbers
+    from phonenumbers import PhoneMetadata
+
+    from utils.phone_length_validator import COUNTRY_DIAL_CODES, COUNTRY_PHONE_LENGTHS, TOLLFREE_PREFIX_OVERRIDES
+
+    region_codes = (
+        set(phonenumbers.SUPPORTED_REGIONS)
+        | set(COUNTRY_PHONE_LENGTHS)
+        | set(COUNTRY_DIAL_CODES)
+    )
+
+    records = []
+    for region_code in sorted(region_codes):
+        metadata = PhoneMetadata.metadata_for_region(region_code)
+        if region_code in COUNTRY_DIAL_CODES:
+            dial_code = int(COUNTRY_DIAL_CODES[region_code])
+        else:
+            dial_code = phonenumbers.country_code_for_region(region_code)
+
+        flags = 0
+        min_length, max_length = COUNTRY_PHONE_LENGTHS.get(region_code, (0, 0))
+        if region_code in COUNTRY_PHONE_LENGTHS:
+            flags |= FLAG_HAS_LENGTH_RULE
+        if region_code in COUNTRY_DIAL_CODES:
+            flags |= FLAG_HAS_DIAL_RULE
+        if phonenumbers.region_code_for_country_code(dial_code) == region_code:
+            flags |= FLAG_MAIN_REGION
+
+        tollfree_pattern = ""
+        general_pattern = ""
+        national_prefix = ""
+        valid_pattern = ""
+        leading_digits = ""
+        if metadata is not None:
+            national_prefix = metadata.national_prefix or ""
+            leading_digits = metadata.leading_digits or ""
+            type_patterns = [
+                getattr(metadata, desc).national_number_pattern
+                for desc in _NUMBER_TYPE_DESCS
+                if getattr(metadata, desc, None) is not None and getattr(metadata, desc).national_number_pattern
+            ]
+            valid_pattern = "|".join(f"(?:{pattern})" for pattern in type_patterns)
+            if metadata.toll_free and metadata.toll_free.national_number_pattern:
+                tollfree_pattern = metadata.toll_free.national_number_pattern
+            if metadata.general_desc and metadata.general_desc.national_number_pattern:
+                general_pattern = metadata.general_desc.national_number_pattern
+
+        records.append({
+            'region_code': region_code,
+            'dial_code': dial_code,
+            'flags': flags,
+            'min_length': min_length,
+            'max_length': max_length,
+            'name': _region_name(region_code),
+            'tollfree_pattern': tollfree_pattern,
+            'general_pattern': general_pattern,
+            'tollfree_prefix': TOLLFREE_PREFIX_OVERRIDES.get(region_code, ""),
+            'national_prefix': national_prefix,
+            'valid_pattern': valid_pattern,
+            'leading_digits': leading_digits,
+        })
+    return records
+
+
+def build_snapshot(output_path=None):
+    """
+    Compile the validation metadata into a binary snapshot file
+
+    The file is written to a temporary name and renamed into place, so
+    workers that already mapped an older snapshot keep a consistent view.
+
+    Args:
+        output_path (str or Path): Destination file (defaults to DEFAULT_SNAPSHOT_PATH)
+
+    Returns:
+        dict: {
+            'path': str,
+            'size_bytes': int,
+            'region_count': int,
+            'rules_version': str
+        }
+    """
+    import phonenumbers
+
+    from utils.phone_length_validator import get_rules_version
+
+    output_path = Path(output_path) if output_path else DEFAULT_SNAPSHOT_PATH
+    records = _collect_regions()
+
+    pool = bytearray()
+    string_refs = {}
+
+    def intern(text):
+        data = text.encode('utf-8')
+        if data not in string_refs:
+            string_refs[data] = (len(pool), len(data))
+            pool.extend(data)
+        return string_refs[data]
+
+    region_blob = bytearray()
+    for record in records:
+        refs = []
+        for field in _STRING_FIELDS:
+            refs.extend(intern(record[field]))
+        region_blob.extend(_REGION.pack(
+            record['region_code'].encode('ascii'),
+            record['dial_code'],
+            record['flags'],
+            record['min_length'],
+            record['max_length'],
+            *refs
+        ))
+
+    # Main region first within a dial code, matching phonenumbers' ordering
+    dial_entries = sorted(
+        (record['dial_code'], not record['flags'] & FLAG_MAIN_REGION, index)
+        for index, record in enumerate(records)
+    )
+    dial_blob = bytearray()
+    for dial_code, _, index in dial_entries:
+        dial_blob.extend(_DIAL.pack(dial_code, index))
+
+    rules_version = get_rules_version()
+    strings_offset = _HEADER.size + len(region_blob) + len(dial_blob)
+    header = _HEADER.pack(
+        SNAPSHOT_MAGIC,
+        SNAPSHOT_FORMAT_VERSION,
+        len(records),
+        len(dial_entries),
+        rules_version.encode('ascii'),
+        phonenumbers.__version__.encode('ascii')[:16],
+        source_fingerprint().encode('ascii'),
+        strings_offset,
+    )
+
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = output_path.with_name(output_path.name + f".tmp{os.getpid()}")
+    with open(tmp_path, 'wb') as handle:
+        handle.write(header)
+        handle.write(region_blob)
+        handle.write(dial_blob)
+        handle.write(pool)
+    os.replace(tmp_path, output_path)
+
+    return {
+        'path': str(output_path),
+        'size_bytes': output_path.stat().st_size,
+        'region_count': len(records),
+        'rules_version': rules_version,
+    }
+
+
+class MetadataSnapshot:
+    """
+    Read-only view over a memory-mapped snapshot file
+
+    Lookups binary-search the fixed-width region table directly in the
+    mapping; only compiled regular expressions are cached per process.
+    """
+
+    def __init__(self, path=None):
+        self.path = Path(path) if path else DEFAULT_SNAPSHOT_PATH
+        with open(self.path, 'rb') as handle:
+            self._mmap = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view = memoryview(self._mmap)
+
+        (magic, format_version, self.region_count, self.dial_count,
+         rules_version, phonenumbers_version, fingerprint, self._strings_offset) = _HEADER.unpack_from(self._view, 0)
+
+        if magic != SNAPSHOT_MAGIC:
+            self.close()
+            raise ValueError(f"{self.path} is not a validation metadata snapshot")
+        if format_version != SNAPSHOT_FORMAT_VERSION:
+            self.close()
+            raise ValueError(
+                f"Snapshot format {format_version} is not supported "
+                f"(expected {SNAPSHOT_FORMAT_VERSION}); rebuild it"
+            )
+
+        self.format_version = format_version
+        self.rules_version = rules_version.rstrip(b"\0").decode('ascii')
+        self.phonenumbers_version = phonenumbers_version.rstrip(b"\0").decode('ascii')
+        self.source_fingerprint = fingerprint.rstrip(b"\0").decode('ascii')
+        self._regions_offset = _HEADER.size
+        self._dial_offset = self._regions_offset + self.region_count * _REGION.size
+        self._patterns = {}
+
+    def close(self):
+        """Release the mapping"""
+        if self._mmap is not None:
+            self._view.release()
+            self._mmap.close()
+            self._mmap = None
+
+    def is_current(self):
+        """Check whether the snapshot was built from the installed rule tables and phonenumbers release"""
+        return self.source_fingerprint == source_fingerprint()
+
+    def _string(self, offset, length):
+        start = self._strings_offset + offset
+        return bytes(self._view[start:start + length]).decode('utf-8')
+
+    def _region_code_at(self, index):
+        start = self._regions_offset + index * _REGION.size
+        return bytes(self._view[start:start + 2])
+
+    def _find_region(self, region_code):
+        key = region_code.upper().encode('ascii')
+        low, high = 0, self.region_count
+        while low < high:
+            middle = (low + high) // 2
+            if self._region_code_at(middle) < key:
+                low = middle + 1
+            else:
+                high = middle
+        if low < self.region_count and self._region_code_at(low) == key:
+            return low
+        return None
+
+    def _record(self, index):
+        fields = _REGION.unpack_from(self._view, self._regions_offset + index * _REGION.size)
+        region_code, dial_code, flags, min_length, max_length = fields[:5]
+        strings = {
+            field: self._string(fields[offset], fields[offset + 1]) or None
+            for field, offset in zip(_STRING_FIELDS, range(5, 5 + 2 * len(_STRING_FIELDS), 2))
+        }
+        return {
+            'region_code': region_code.decode('ascii'),
+            'dial_code': str(dial_code),
+            'length_range': (min_length, max_length) if flags & FLAG_HAS_LENGTH_RULE else None,
+            'has_dial_rule': bool(flags & FLAG_HAS_DIAL_RULE),
+            'is_main_region': bool(flags & FLAG_MAIN_REGION),
+            **strings,
+        }
+
+    def get_region(self, region_code):
+        """
+        Get the compiled metadata for a region
+
+        Args:
+            region_code (str): ISO 3166-1 alpha-2 country code
+
+        Returns:
+            dict or None: Region record, or None if the region is not in the snapshot
+        """
+        if not region_code or len(region_code) != 2:
+            return None
+        index = self._find_region(region_code)
+        return self._record(index) if index is not None else None
+
+    def regions_for_dial_code(self, dial_code):
+        """
+        Get the region codes sharing a dial code, main region first
+
+        Args:
+            dial_code (int or str): Country calling code (e.g., 1 or '44')
+
+        Returns:
+            list: Region codes (e.g., ['US', 'AG', ...]), empty if unknown
+        """
+        dial_code = int(dial_code)
+        low, high = 0, self.dial_count
+        while low < high:
+            middle = (low + high) // 2
+            if _DIAL.unpack_from(self._view, self._dial_offset + middle * _DIAL.size)[0] < dial_code:
+                low = middle + 1
+            else:
+                high = middle
+
+        regions = []
+        for position in range(low, self.dial_count):
+            code, index = _DIAL.unpack_from(self._view, self._dial_offset + position * _DIAL.size)
+            if code != dial_code:
+                break
+            regions.append(self._region_code_at(index).decode('ascii'))
+        return regions
+
+    def compiled_pattern(self, region_code, kind):
+        """
+        Get a compiled full-match regex for a region's 'tollfree', 'general' or 'valid' pattern
+
+        Returns:
+            re.Pattern or None: Compiled pattern, or None if the region has none
+        """
+        key = (region_code, kind)
+        if key not in self._patterns:
+            record = self.get_region(region_code)
+            pattern = record.get(f'{kind}_pattern') if record else None
+            self._patterns[key] = re.compile(f"(?:{pattern})") if pattern else None
+        return self._patterns[key]
+
+    def all_region_codes(self):
+        """List every region code in the snapshot, sorted"""
+        return [self._region_code_at(index).decode('ascii') for index in range(self.region_count)]
+
+
+@lru_cache(maxsize=None)
+def load_snapshot(path=None):
+    """
+    Map a snapshot file once per process
+
+    Args:
+        path (str or Path): Snapshot file (defaults to DEFAULT_SNAPSHOT_PATH)
+
+    Returns:
+        MetadataSnapshot: Shared read-only view
+
+    Raises:
+        FileNotFoundError: If the snapshot has not been built yet
+    """
+    path = Path(path) if path else DEFAULT_SNAPSHOT_PATH
+    if not path.exists():
+        raise FileNotFoundError(
+            f"Snapshot {path} not found; build it with "
+            f"'python -m utils.metadata_snapshot build'"
+        )
+    return MetadataSnapshot(path)
+
+
+def _main(argv=None):
+    parser = argparse.ArgumentParser(description="Build or inspect the validation metadata snapshot")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    build_parser = subparsers.add_parser('build', help="Compile the snapshot file")
+    build_parser.add_argument('--output', default=None, help="Destination path")
+
+    info_parser = subparsers.add_parser('info', help="Show snapshot header and lookups")
+    info_parser.add_argument('--path', default=None, help="Snapshot path")
+    info_parser.add_argument('--region', default=None, help="Region code to look up")
+
+    args = parser.parse_args(argv)
+
+    if args.command == 'build':
+        started = time.perf_counter()
+        summary = build_snapshot(args.output)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        print(f"Wrote {summary['path']} ({summary['size_bytes']:,} bytes, "
+              f"{summary['region_count']} regions, rules {summary['rules_version']}) "
+              f"in {elapsed_ms:.0f} ms")
+        return 0
+
+    started = time.perf_counter()
+    snapshot = MetadataSnapshot(args.path)
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    print(f"Snapshot: {snapshot.path}")
+    print(f"  Format version: {snapshot.format_version}")
+    print(f"  Rules version: {snapshot.rules_version} "
+          f"({'current' if snapshot.is_current() else 'STALE - rebuild'})")
+    print(f"  phonenumbers: {snapshot.phonenumbers_version}")
+    print(f"  Regions: {snapshot.region_count}")
+    print(f"  Open time: {elapsed_ms:.2f} ms")
+    if args.region:
+        print(f"\n{args.region.upper()}: {snapshot.get_region(args.region)}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(_main())
@@ -0,0 +1,421 @@
+"""
+Phone Number Checker
+Runs the per-number validation behind the app - parsing, enrichment, length,
+duplicate country code, suspicious pattern and toll-free checks - without any
+Streamlit dependency, so batch scripts and workers share the exact same logic.
+Number parsing and lookups go through a validation backend (see
+utils.validation_backends), selectable per call.
+
+An optional region allowlist (PHONE_VALIDATOR_REGIONS="US,GB,DE" or
+set_region_allowlist) restricts validation to the listed regions: numbers from
+other regions fast-fail before their metadata is loaded, and the geocoder's
+prefix tables (the largest dataset, only consulted for regions pycountry cannot
+name) are never imported for listed ISO regions. Invalid numbers under an
+allowed calling code belong to no region; they are reported as invalid, not
+as out of region. Without an allowlist the geocoder is imported on first use;
+preload_lookups() loads it up front, as run_batch does before tracing its
+calibration chunks.
+
+Checks run cheapest first. In fail-fast mode (mode=FAIL_FAST) a row that a
+cheap check already marks bad - too short to parse, unparseable, invalid,
+wrong length or a repeated dial code - skips the expensive stages:
+country/carrier/timezone enrichment, international formatting and, for
+invalid numbers, toll-free typing. Every flag (and so every summary count)
+matches full-detail mode, the default, which fills in every field.
+"""
+
+import hashlib
+import os
+from functools import lru_cache
+
+import phonenumbers
+
+from utils.phone_length_validator import (
+    check_duplicate_country_code,
+    get_rules_version,
+    is_tollfree_number,
+    validate_phone_length,
+)
+from utils.validation_backends import DEFAULT_BACKEND, get_backend
+
+# Column order of a validation result row (CSV/Excel/JSON exports)
+RESULT_FIELDS = [
+    "original",
+    "is_valid",
+    "is_valid_length",
+    "has_duplicate_code",
+    "is_suspicious",
+    "is_tollfree",
+    "tollfree_prefix",
+    "tollfree_type",
+    "country",
+    "region_code",
+    "carrier",
+    "international",
+    "e164",
+    "timezone",
+    "actual_length",
+    "expected_length",
+]
+
+# Column stamped with get_checker_version() on stored results, so delta
+# revalidation can tell which rows are still current
+VERSION_FIELD = "rules_version"
+
+# Distinct inputs remembered by check_phone_cached
+CHECK_CACHE_SIZE = 4096
+
+# Comma-separated region codes read at import time to set the allowlist
+REGION_ALLOWLIST_ENV = "PHONE_VALIDATOR_REGIONS"
+# Country value of rows outside the allowlist
+REGION_NOT_ALLOWED = "Region Not Allowed"
+
+# Check modes: every field of every row, or skip expensive stages for rows
+# that cheap checks already mark bad
+FULL_DETAIL = "full"
+FAIL_FAST = "fail_fast"
+CHECK_MODES = (FULL_DETAIL, FAIL_FAST)
+# Value of the enrichment fields a fail-fast check skipped
+NOT_CHECKED = "Not Checked"
+SKIPPED_FIELDS = ("country", "carrier", "timezone")
+# Inputs with fewer digits or letters (which the parser maps to digits) than
+# this can never parse: a calling code plus a two-digit national number
+MIN_INPUT_CHARACTERS = 3
+
+_region_allowlist = None
+_allowed_country_codes = None
+
+
+def set_region_allowlist(regions):
+    """
+    Restrict validation to a set of regions, or lift the restriction
+
+    Args:
+        regions (iterable or str): ISO region codes (a comma-separated string
+            is accepted); None or empty validates every region
+
+    Raises:
+        ValueError: If a code is not a region phonenumbers supports
+    """
+    global _region_allowlist, _allowed_country_codes
+    if isinstance(regions, str):
+        regions = regions.split(",")
+    allowlist = frozenset(region.strip().upper() for region in regions or [] if region.strip())
+    unknown = sorted(allowlist - phonenumbers.SUPPORTED_REGIONS)
+    if unknown:
+        raise ValueError(f"Unknown region codes in allowlist: {', '.join(unknown)}")
+
+    if allowlist:
+        _region_allowlist = allowlist
+        _allowed_country_codes = frozenset(
+            country_code
+            for country_code, region_codes in phonenumbers.COUNTRY_CODE_TO_REGION_CODE.items()
+            if allowlist.intersection(region_codes)
+        )
+    else:
+        _region_allowlist = None
+        _allowed_country_codes = None
+    _check_phone_detailed_cached.cache_clear()
+
+
+def preload_lookups(backend=None):
+    """
+    Load the lookup tables a check would otherwise import on first use
+
+    Call before timing or tracing validation. Nothing is loaded under a region
+    allowlist, which never needs the geocoder for listed regions.
+
+    Args:
+        backend (ValidationBackend): Backend to warm up (defaults to get_backend())
+    """
+    if not _region_allowlist:
+        (backend or get_backend()).preload()
+
+
+def get_region_allowlist():
+    """Get the allowed region codes as a sorted list, or None when unrestricted"""
+    return sorted(_region_allowlist) if _region_allowlist else None
+
+
+def get_checker_version(backend=None, mode=FULL_DETAIL):
+    """
+    Fingerprint of everything that shapes a result row
+
+    The rules version, extended with the allowlist when one is set, with the
+    backend name when it is not the default and with the check mode when it
+    is fail-fast, so stored results produced under a different allowlist,
+    backend or mode are revalidated.
+
+    Args:
+        backend (ValidationBackend): Backend the results come from (defaults to get_backend())
+        mode (str): Check mode the results come from
+
+    Returns:
+        str: Fingerprint (e.g., '3f9a1c0b7d2e' or '3f9a1c0b7d2e-a1b2c3-compiled-failfast')
+    """
+    version = get_rules_version()
+    if _region_allowlist:
+        allowlist_digest = hashlib.sha1(",".join(sorted(_region_allowlist)).encode('ascii')).hexdigest()[:6]
+        version = f"{version}-{allowlist_digest}"
+    backend = backend or get_backend()
+    if backend.name != DEFAULT_BACKEND:
+        version = f"{version}-{backend.name}"
+    if mode == FAIL_FAST:
+        version = f"{version}-failfast"
+    return version
+
+
+def _calling_code(phone_input):
+    """Country calling code an input starts with, read from the static code table"""
+    digits = "".join(character for character in phone_input[:8] if character.isdigit())
+    for length in (1, 2, 3):
+        if len(digits) >= length and int(digits[:length]) in phonenumbers.COUNTRY_CODE_TO_REGION_CODE:
+            return int(digits[:length])
+    return None
+
+
+def normalize_phone_input(phone_input):
+    """Add the leading '+' the parser needs when the input has none"""
+    if not phone_input.startswith("+"):
+        phone_input = "+" + phone_input.strip()
+    return phone_input
+
+
+def check_suspicious(phone_number):
+    """Check if last 5 digits are all the same"""
+    clean_number = phone_number.replace('+', '').replace(' ', '').replace('-', '')
+    if len(clean_number) >= 5:
+        last_5 = clean_number[-5:]
+        if len(set(last_5)) == 1:
+            return True
+    return False
+
+
+def error_result(phone_input):
+    """Result row for an input that could not be parsed"""
+    return {
+        "original": phone_input,
+        "is_valid": False,
+        "is_valid_length": False,
+        "has_duplicate_code": False,
+        "is_suspicious": False,
+        "is_tollfree": False,
+        "tollfree_prefix": None,
+        "tollfree_type": None,
+        "country": "Error",
+        "region_code": "Error",
+        "carrier": "Error",
+        "international": phone_input,
+        "e164": phone_input,
+        "timezone": "Error",
+        "actual_length": 0,
+        "expected_length": "Error"
+    }
+
+
+def region_not_allowed_result(phone_input, region_code=None):
+    """Result row for a number from a region outside the allowlist"""
+    result = error_result(phone_input)
+    result.update({
+        "country": REGION_NOT_ALLOWED,
+        "region_code": region_code or "Unknown",
+        "carrier": REGION_NOT_ALLOWED,
+        "timezone": REGION_NOT_ALLOWED,
+        "expected_length": REGION_NOT_ALLOWED
+    })
+    return result
+
+
+def _is_too_short(phone_input):
+    return sum(character.isalnum() for character in phone_input) < MIN_INPUT_CHARACTERS
+
+
+def _region_not_allowed(phone_input, country_code=None, region_code=None):
+    location = f"Region {region_code}" if region_code else f"Country code +{country_code}"
+    return {
+        'result': region_not_allowed_result(phone_input, region_code),
+        'country_code': country_code,
+        'length_validation': None,
+        'duplicate_check': None,
+        'tollfree_result': None,
+        'error': f"{location} is outside the configured region allowlist ({', '.join(get_region_allowlist())})",
+        'status': 'region_not_allowed'
+    }
+
+
+def check_phone_detailed(phone_input, backend=None, mode=FULL_DETAIL):
+    """
+    Validate a phone number and keep the intermediate check results
+
+    Args:
+        phone_input (str): Phone number with country code, '+' optional
+        backend (ValidationBackend): Backend used for parsing and lookups
+            (defaults to get_backend())
+        mode (str): FULL_DETAIL, or FAIL_FAST to skip enrichment (fields
+            set to NOT_CHECKED) and international formatting (E.164 is used)
+            once the number is invalid, has the wrong length or repeats its
+            dial code; flags match full-detail mode
+
+    Returns:
+        dict: {
+            'result': dict (flat result row, keys in RESULT_FIELDS order),
+            'country_code': int or None,
+            'length_validation': dict or None,
+            'duplicate_check': dict or None,
+            'tollfree_result': dict or None,
+            'error': str or None,
+            'status': 'ok', 'error' or 'region_not_allowed'
+        }
+    """
+    if mode not in CHECK_MODES:
+        raise ValueError(f"Unknown check mode '{mode}' (expected one of {', '.join(CHECK_MODES)})")
+    phone_input = normalize_phone_input(phone_input)
+    backend = backend or get_backend()
+    fail_fast = mode == FAIL_FAST
+
+    # Fast-fail on the calling code before any region metadata is loaded
+    if _region_allowlist:
+        calling_code = _calling_code(phone_input)
+        if calling_code is not None and calling_code not in _allowed_country_codes:
+            return _region_not_allowed(phone_input, country_code=calling_code)
+
+    if fail_fast and _is_too_short(phone_input):
+        return {
+            'result': error_result(phone_input),
+            'country_code': None,
+            'length_validation': None,
+            'duplicate_check': None,
+            'tollfree_result': None,
+            'error': "The string supplied is too short to be a phone number",
+            'status': 'error'
+        }
+
+    try:
+        parsed_number = backend.parse(phone_input)
+        region_code = backend.region_code(parsed_number)
+        # Calling codes shared by several regions (e.g., +1) are narrowed here;
+        # invalid numbers have no region and were already let through on their code
+        if _region_allowlist and region_code is not None and region_code not in _region_allowlist:
+            return _region_not_allowed(phone_input, parsed_number.country_code, region_code)
+        country_code = parsed_number.country_code
+        e164_format = backend.format(parsed_number, 'e164')
+
+        # Cheap checks first: string checks on the E.164 form, then validity
+        length_validation = validate_phone_length(e164_format, region_code)
+        duplicate_check = check_duplicate_country_code(e164_format, region_code)
+        is_suspicious = check_suspicious(e164_format)
+        is_valid = backend.is_valid(parsed_number)
+
+        # Toll-free is a summary flag, so fail-fast only skips it where the
+        # answer is already known: invalid numbers are never toll-free
+        if fail_fast and not is_valid:
+            tollfree_result = {
+                'is_tollfree': False,
+                'matched_prefix': None,
+                'message': 'Invalid phone number'
+            }
+        else:
+            # Reuses the parsed number instead of parsing the E.164 form again
+            tollfree_result = is_tollfree_number(e164_format, region_code, backend=backend, parsed_number=parsed_number)
+
+        if fail_fast and (not is_valid
+                          or length_validation['is_valid_length'] is False
+                          or duplicate_check['has_duplicate']):
+            country = sim_carrier = tz_str = NOT_CHECKED
+            international_format = e164_format
+        elif _region_allowlist and region_code is None:
+            # Naming a number without a region needs the geocoder, which
+            # restricted mode never loads
+            country = sim_carrier = None
+            tz_str = "Unknown"
+            international_format = backend.format(parsed_number, 'international')
+        else:
+            enrichment = backend.enrich(parsed_number, region_code)
+            country = enrichment['country']
+            sim_carrier = enrichment['carrier']
+            tz_str = enrichment['timezone']
+            international_format = backend.format(parsed_number, 'international')
+        is_tollfree = tollfree_result['is_tollfree']
+
+        # FIXED: Use display format for CSV/Excel compatibility
+        result = {
+            "original": phone_input,
+            "is_valid": is_valid,
+            "is_valid_length": length_validation['is_valid_length'],
+            "has_duplicate_code": duplicate_check['has_duplicate'],
+            "is_suspicious": is_suspicious,
+            "is_tollfree": is_tollfree,
+            "tollfree_prefix": tollfree_result['matched_prefix'],
+            "tollfree_type": tollfree_result.get('type', None),
+            "country": country if country else "Unknown",
+            "region_code": region_code if region_code else "Unknown",
+            "carrier": sim_carrier if sim_carrier else "Unknown",
+            "international": international_format,
+            "e164": e164_format,
+            "timezone": tz_str,
+            "actual_length": length_validation['actual_length'],
+            "expected_length": length_validation['expected_range_display'] if length_validation.get('expected_range_display') else "Unknown"
+        }
+
+        return {
+            'result': result,
+            'country_code': country_code,
+            'length_validation': length_validation,
+            'duplicate_check': duplicate_check,
+            'tollfree_result': tollfree_result,
+            'error': None,
+            'status': 'ok'
+        }
+
+    except Exception as e:
+        return {
+            'result': error_result(phone_input),
+            'country_code': None,
+            'length_validation': None,
+            'duplicate_check': None,
+            'tollfree_result': None,
+            'error': str(e),
+            'status': 'error'
+        }
+
+
+def check_phone(phone_input, backend=None, mode=FULL_DETAIL):
+    """
+    Validate a phone number and return its flat result row
+
+    Args:
+        phone_input (str): Phone number with country code, '+' optional
+        backend (ValidationBackend): Backend used for parsing and lookups
+            (defaults to get_backend())
+        mode (str): FULL_DETAIL or FAIL_FAST (see check_phone_detailed)
+
+    Returns:
+        dict: Result row with the keys in RESULT_FIELDS
+    """
+    return check_phone_detailed(phone_input, backend=backend, mode=mode)['result']
+
+
+@lru_cache(maxsize=CHECK_CACHE_SIZE)
+def _check_phone_detailed_cached(phone_input, backend_name):
+    return check_phone_detailed(phone_input, backend=get_backend(backend_name))
+
+
+def check_phone_cached(phone_input, backend=None):
+    """
+    check_phone_detailed behind a process-wide LRU cache, for interactive use
+
+    Inputs are keyed after normalization, so every prefix typed once (and every
+    number any session has already checked) comes back without re-parsing.
+    The returned dict is shared between callers and must not be modified.
+
+    Args:
+        phone_input (str): Phone number with country code, '+' optional
+        backend (str): Backend name (defaults to get_backend())
+
+    Returns:
+        dict: Same structure as check_phone_detailed
+    """
+    return _check_phone_detailed_cached(normalize_phone_input(phone_input.strip()), backend or get_backend().name)
+
+
+set_region_allowlist(os.environ.get(REGION_ALLOWLIST_ENV))
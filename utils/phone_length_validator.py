@@ -5,6 +5,8 @@ detects toll-free numbers, and identifies duplicate country codes
 """
 
 import phonenumbers
+import hashlib
+import json
 import re
 
 # Country-specific phone number length requirements (min, max)
@@ -141,6 +143,12 @@ COUNTRY_DIAL_CODES = {
     "NA": "264", "BW": "267", "MU": "230", "RW": "250",
 }
 
+# Regions whose toll-free range is detected by national prefix instead of
+# libphonenumber's number type (ISO alpha-2 to national prefix)
+TOLLFREE_PREFIX_OVERRIDES = {
+    "KW": "1800",  # Kuwait
+}
+
 
 def check_duplicate_country_code(phone_number, country_code):
     """
@@ -275,7 +283,29 @@ def validate_phone_length(phone_number, country_code):
         }
 
 
-def is_tollfree_number(phone_number, country_code=None):
+def is_tollfree_number(phone_number, country_code=None, backend=None, parsed_number=None):
+    """
+    Check whether a number is toll-free
+
+    Args:
+        phone_number (str): The full phone number in E.164 format
+        country_code (str): ISO 3166-1 alpha-2 country code (selects prefix overrides)
+        backend (ValidationBackend): Backend used to parse and type the number
+            (defaults to utils.validation_backends.get_backend())
+        parsed_number (ParsedNumber): The number already parsed by `backend`,
+            so it is not parsed a second time
+
+    Returns:
+        dict: {
+            'is_tollfree': bool,
+            'matched_prefix': str or None,
+            'message': str
+        }
+    """
+    # Imported here so this module still runs as a plain script
+    from utils.validation_backends import TOLL_FREE, get_backend
+
+    backend = backend or get_backend()
 
     if not phone_number or not isinstance(phone_number, str):
         return {
@@ -287,23 +317,24 @@ def is_tollfree_number(phone_number, country_code=None):
     country_code = country_code.upper() if country_code else None
 
     try:
-        parsed_number = phonenumbers.parse(phone_number, country_code)
+        if parsed_number is None:
+            parsed_number = backend.parse(phone_number)
 
-        if not phonenumbers.is_valid_number(parsed_number):
+        if not backend.is_valid(parsed_number):
             return {
                 'is_tollfree': False,
                 'matched_prefix': None,
                 'message': 'Invalid phone number'
             }
 
-        national_number = str(parsed_number.national_number)
+        national_number = parsed_number.national_number
 
         # 🔴 KUWAIT OVERRIDE (critical)
         if country_code == "KW":
-            if national_number.startswith("1800"):
+            if national_number.startswith(TOLLFREE_PREFIX_OVERRIDES["KW"]):
                 return {
                     'is_tollfree': True,
-                    'matched_prefix': "1800",
+                    'matched_prefix': TOLLFREE_PREFIX_OVERRIDES["KW"],
                     'message': '✓ Kuwait Toll-free (1800XXX)'
                 }
             return {
@@ -312,10 +343,8 @@ def is_tollfree_number(phone_number, country_code=None):
                 'message': 'Not a Kuwait toll-free number'
             }
 
-        # Default libphonenumber logic
-        number_type = phonenumbers.number_type(parsed_number)
-
-        if number_type == phonenumbers.PhoneNumberType.TOLL_FREE:
+        # Default logic: the backend's number type
+        if backend.number_type(parsed_number) == TOLL_FREE:
             return {
                 'is_tollfree': True,
                 'matched_prefix': national_number[:4],
@@ -337,19 +366,21 @@ def is_tollfree_number(phone_number, country_code=None):
 
 
 
-def validate_phone_complete(phone_number, country_code):
+def validate_phone_complete(phone_number, country_code, backend=None, parsed_number=None):
     """
     Perform complete validation: length, toll-free status, and duplicate country code check
     
     Args:
         phone_number (str): The full phone number
         country_code (str): ISO 3166-1 alpha-2 country code
+        backend (ValidationBackend): Backend used for the toll-free check
+        parsed_number (ParsedNumber): The number already parsed by `backend`
     
     Returns:
         dict: Complete validation results combining all checks
     """
     length_result = validate_phone_length(phone_number, country_code)
-    tollfree_result = is_tollfree_number(phone_number, country_code)
+    tollfree_result = is_tollfree_number(phone_number, country_code, backend=backend, parsed_number=parsed_number)
     duplicate_result = check_duplicate_country_code(phone_number, country_code)
     
     return {
@@ -417,8 +448,34 @@ def get_country_dial_code(country_code):
     return COUNTRY_DIAL_CODES.get(country_code)
 
 
+def get_rules_version():
+    """
+    Get a short fingerprint of the validation rules in effect
+    
+    Covers the length table, the dial code table, the toll-free overrides and
+    the installed phonenumbers metadata, so stored results can be checked
+    against the rules that produced them.
+    
+    Returns:
+        str: 12-character hex fingerprint (e.g., '3f9a1c0b7d2e')
+    """
+    payload = json.dumps([
+        sorted(COUNTRY_PHONE_LENGTHS.items()),
+        sorted(COUNTRY_DIAL_CODES.items()),
+        sorted(TOLLFREE_PREFIX_OVERRIDES.items()),
+        phonenumbers.__version__,
+    ])
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()[:12]
+
+
 # Example usage and testing
 if __name__ == "__main__":
+    import sys
+    from pathlib import Path
+
+    # Run as `python utils/phone_length_validator.py`: make the utils package importable
+    sys.path.append(str(Path(__file__).resolve().parent.parent))
+
     # Test cases - including duplicate country codes for multiple countries
     test_cases = [
         # Duplicate country code tests (various countries)
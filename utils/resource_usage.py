@@ -0,0 +1,53 @@
+"""
+Process Resource Usage
+Lightweight resident-memory readings for benchmarks and memory budgets,
+using /proc when available and the resource module elsewhere
+"""
+
+import sys
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def _read_proc_status(field):
+    try:
+        with open("/proc/self/status") as handle:
+            for line in handle:
+                if line.startswith(field + ":"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return None
+
+
+def peak_rss_bytes():
+    """
+    Get the peak resident set size of this process
+
+    Returns:
+        int or None: Bytes, or None if the platform does not report it
+    """
+    peak = _read_proc_status("VmHWM")
+    if peak is not None:
+        return peak
+    if resource is None:
+        return None
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is bytes on macOS and kilobytes on Linux/BSD
+    return max_rss if sys.platform == "darwin" else max_rss * 1024
+
+
+def current_rss_bytes():
+    """
+    Get the current resident set size of this process
+
+    Falls back to the peak value where the current one is not available.
+
+    Returns:
+        int or None: Bytes, or None if the platform does not report it
+    """
+    current = _read_proc_status("VmRSS")
+    return current if current is not None else peak_rss_bytes()
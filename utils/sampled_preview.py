@@ -0,0 +1,317 @@
+"""
+Sampled Quality Preview
+Estimates how dirty a huge input file is from a small random sample, in
+seconds instead of a full run. Rows are drawn either with reservoir sampling
+(one streaming pass, counts every line) or with random byte-offset seeks
+(reads only the sampled lines, so it stays fast on files of any size). Both
+are exactly uniform over lines: a seek is kept only when it lands on the first
+byte of a line, so long lines are not favoured. The sampled numbers go
+through the full checks, and every rate is reported with a Wilson score
+confidence interval, overall and per region.
+
+Usage:
+    python -m utils.sampled_preview INPUT [--sample 2000] [--method reservoir|seek] [--seed 0] [--json report.json]
+"""
+
+import argparse
+import csv
+import itertools
+import json
+import math
+import random
+import sys
+import time
+from functools import partial
+from pathlib import Path
+from statistics import NormalDist
+
+from utils.phone_checker import FAIL_FAST, check_phone
+from utils.validation_aggregates import SUMMARY_METRICS, ValidationAggregate
+
+# Quality metrics estimated from the sample, in display order
+PREVIEW_METRICS = [
+    (key, label) for key, label in SUMMARY_METRICS
+    if key in ("invalid_format", "invalid_length", "duplicate_code", "tollfree", "suspicious")
+]
+
+# The preview only reports flags, which fail-fast checks leave unchanged
+PREVIEW_CHECK = partial(check_phone, mode=FAIL_FAST)
+
+# Header cells that name the phone number column of a CSV input
+PHONE_COLUMNS = ("original", "phone")
+
+# Seeks tried per requested line before seek_sample settles for a smaller
+# sample (a seek is kept with probability 1 / average line length)
+SEEK_TRIALS_PER_LINE = 1000
+
+
+def wilson_interval(successes, trials, confidence=0.95):
+    """
+    Wilson score interval for a binomial proportion
+
+    Args:
+        successes (int): Rows with the property
+        trials (int): Rows sampled
+        confidence (float): Coverage of the interval (e.g., 0.95)
+
+    Returns:
+        tuple: (low, high) as fractions, (0.0, 1.0) when nothing was sampled
+    """
+    if trials == 0:
+        return 0.0, 1.0
+    z = NormalDist().inv_cdf(0.5 + confidence / 2)
+    proportion = successes / trials
+    denominator = 1 + z * z / trials
+    centre = (proportion + z * z / (2 * trials)) / denominator
+    margin = z * math.sqrt(proportion * (1 - proportion) / trials + z * z / (4 * trials * trials)) / denominator
+    return max(0.0, centre - margin), min(1.0, centre + margin)
+
+
+def reservoir_sample(lines, size, rng):
+    """
+    Uniformly sample `size` items from an iterable in one pass (Algorithm L)
+
+    Draws one random skip per replacement instead of one random number per
+    item, and skipped items are consumed with islice, so unsampled lines are
+    never handled in Python code.
+
+    Args:
+        lines (iterable): Items to sample from
+        size (int): Sample size
+        rng (random.Random): Random source
+
+    Returns:
+        tuple: (sample list, number of items seen)
+    """
+    iterator = iter(lines)
+    reservoir = list(itertools.islice(iterator, size))
+    seen = len(reservoir)
+    if seen < size or size == 0:
+        return reservoir, seen
+
+    weight = math.exp(math.log(rng.random()) / size)
+    while True:
+        skip = int(math.log(rng.random()) / math.log(1 - weight))
+        # Skips average seen/size items, so holding them briefly is cheap
+        # and keeps the count exact when the input ends mid-skip
+        block = list(itertools.islice(iterator, skip + 1))
+        seen += len(block)
+        if len(block) <= skip:
+            return reservoir, seen
+        reservoir[rng.randrange(size)] = block[-1]
+        weight *= math.exp(math.log(rng.random()) / size)
+
+
+def seek_sample(handle, size, rng, start=0):
+    """
+    Sample `size` lines by seeking to random byte offsets (with replacement)
+
+    An offset is kept only when it is the first byte of a line, which happens
+    with the same probability for every line whatever its length; the others
+    are rejected. The share of kept offsets also estimates the line count.
+    Gives up after SEEK_TRIALS_PER_LINE seeks per requested line, returning
+    a smaller (still uniform) sample.
+
+    Args:
+        handle (file): Binary file object supporting seek
+        size (int): Lines to draw
+        rng (random.Random): Random source
+        start (int): Byte offset of the first data line (after any header)
+
+    Returns:
+        tuple: (sample list of bytes lines, estimated number of lines)
+    """
+    handle.seek(0, 2)
+    end = handle.tell()
+    if end <= start:
+        return [], 0
+
+    sample = []
+    trials = 0
+    while len(sample) < size and trials < size * SEEK_TRIALS_PER_LINE:
+        trials += 1
+        offset = rng.randrange(start, end)
+        if offset > start:
+            handle.seek(offset - 1)
+            if handle.read(1) != b"\n":
+                continue
+        handle.seek(offset)
+        sample.append(handle.readline())
+    estimated_lines = round((end - start) * len(sample) / trials)
+    return sample, estimated_lines
+
+
+def _phone_column(header_line):
+    cells = next(csv.reader([header_line]))
+    normalized = [cell.strip().lower() for cell in cells]
+    for name in PHONE_COLUMNS:
+        if name in normalized:
+            return normalized.index(name)
+    return 0
+
+
+def _sample_lines(handle, sample_size, method, rng, is_csv):
+    """Draw raw lines from a binary handle; returns (lines, line count, exact count?, column)"""
+    column = None
+    start = 0
+    if is_csv:
+        header = handle.readline()
+        column = _phone_column(header.decode('utf-8', errors='replace'))
+        start = handle.tell()
+
+    if method == "reservoir":
+        handle.seek(start)
+        lines, line_count = reservoir_sample(iter(handle.readline, b""), sample_size, rng)
+        return lines, line_count, True, column
+    if method == "seek":
+        lines, line_count = seek_sample(handle, sample_size, rng, start=start)
+        return lines, line_count, False, column
+    raise ValueError(f"Unknown sampling method '{method}' (expected 'reservoir' or 'seek')")
+
+
+def _decode_numbers(lines, column):
+    numbers = []
+    for line in lines:
+        text = line.decode('utf-8', errors='replace').strip()
+        if column is not None and text:
+            cells = next(csv.reader([text]), [])
+            text = cells[column].strip() if column < len(cells) else ""
+        if text:
+            numbers.append(text)
+    return numbers
+
+
+def _estimates(counts, sampled, confidence, exact):
+    estimates = {}
+    for key, _ in PREVIEW_METRICS:
+        count = counts.get(key, 0)
+        rate = count / sampled if sampled else 0.0
+        low, high = (rate, rate) if exact else wilson_interval(count, sampled, confidence)
+        estimates[key] = {'count': count, 'rate': rate, 'low': low, 'high': high}
+    return estimates
+
+
+def preview_quality(source, sample_size=2000, method="reservoir", seed=0, confidence=0.95,
+                    check=PREVIEW_CHECK, top_regions=20):
+    """
+    Estimate data quality rates of a large input from a random sample
+
+    Args:
+        source (str, Path or file-like): Text file (one number per line) or CSV
+            (phone/original column, else the first); uploaded files are accepted
+        sample_size (int): Rows to validate
+        method (str): 'reservoir' (one full pass, exact line count) or 'seek'
+            (random offsets, estimated line count)
+        seed (int): Random seed, so a preview can be reproduced
+        confidence (float): Coverage of the reported intervals
+        check (callable): Per-number checker returning a result dict
+        top_regions (int): Regions reported, largest sample share first
+
+    Returns:
+        dict: {
+            'method': str,
+            'sampled': int (non-blank numbers validated),
+            'total_lines': int (exact for reservoir, estimated for seek),
+            'total_exact': bool,
+            'confidence': float,
+            'rates': dict ({metric: {'count', 'rate', 'low', 'high'}}),
+            'regions': list (per region: 'region_code', 'sampled', 'share' with
+                'share_low'/'share_high', and a rate dict per metric),
+            'sample_seconds': float,
+            'validate_seconds': float
+        }
+    """
+    rng = random.Random(seed)
+    name = getattr(source, 'name', str(source))
+    is_csv = Path(name).suffix.lower() == ".csv"
+
+    started = time.perf_counter()
+    if hasattr(source, 'read'):
+        source.seek(0)
+        lines, line_count, exact_count, column = _sample_lines(source, sample_size, method, rng, is_csv)
+    else:
+        with open(source, 'rb') as handle:
+            lines, line_count, exact_count, column = _sample_lines(handle, sample_size, method, rng, is_csv)
+    numbers = _decode_numbers(lines, column)
+    sample_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    aggregate = ValidationAggregate().add_rows(check(phone) for phone in numbers)
+    validate_seconds = time.perf_counter() - started
+
+    sampled = len(numbers)
+    # A reservoir that holds every line is a census, not a sample
+    census = exact_count and len(lines) >= line_count
+    regions = []
+    for group in aggregate.breakdown("region_code", top=top_regions):
+        share_low, share_high = (
+            (group['total'] / sampled,) * 2 if census else wilson_interval(group['total'], sampled, confidence)
+        )
+        regions.append({
+            'region_code': group['region_code'],
+            'sampled': group['total'],
+            'share': group['total'] / sampled if sampled else 0.0,
+            'share_low': share_low,
+            'share_high': share_high,
+            'rates': _estimates(group, group['total'], confidence, census),
+        })
+
+    return {
+        'method': method,
+        'sampled': sampled,
+        'total_lines': line_count,
+        'total_exact': exact_count,
+        'confidence': confidence,
+        'rates': _estimates(aggregate.summary(), sampled, confidence, census),
+        'regions': regions,
+        'sample_seconds': sample_seconds,
+        'validate_seconds': validate_seconds,
+    }
+
+
+def render_text(preview):
+    """Plain-text report of a preview"""
+    total_note = "" if preview['total_exact'] else "~"
+    lines = [
+        f"Sampled {preview['sampled']:,} of {total_note}{preview['total_lines']:,} lines "
+        f"({preview['method']}, sample {preview['sample_seconds']:.2f}s, "
+        f"validation {preview['validate_seconds']:.2f}s)",
+        f"Estimated rates with {preview['confidence']:.0%} confidence intervals:",
+    ]
+    for key, label in PREVIEW_METRICS:
+        estimate = preview['rates'][key]
+        lines.append(f"  {label + ':':<17}{estimate['rate']:>7.1%}   [{estimate['low']:.1%} - {estimate['high']:.1%}]")
+
+    lines.append("")
+    lines.append(f"{'Region':<10}{'Share':>16}" + "".join(f"{label:>16}" for _, label in PREVIEW_METRICS))
+    for region in preview['regions']:
+        cells = [f"{region['share']:.1%} ±{(region['share_high'] - region['share_low']) / 2:.1%}"]
+        cells += [
+            f"{region['rates'][key]['rate']:.1%} ±{(region['rates'][key]['high'] - region['rates'][key]['low']) / 2:.1%}"
+            for key, _ in PREVIEW_METRICS
+        ]
+        lines.append(f"{str(region['region_code'])[:9]:<10}" + "".join(f"{cell:>16}" for cell in cells))
+    return "\n".join(lines)
+
+
+def _main(argv=None):
+    parser = argparse.ArgumentParser(description="Estimate data quality of a large input from a random sample")
+    parser.add_argument('input', help="Text file (one number per line) or CSV")
+    parser.add_argument('--sample', type=int, default=2000, help="Rows to validate")
+    parser.add_argument('--method', choices=["reservoir", "seek"], default="reservoir",
+                        help="reservoir: one pass, exact; seek: random offsets, fastest on huge files")
+    parser.add_argument('--seed', type=int, default=0, help="Random seed")
+    parser.add_argument('--confidence', type=float, default=0.95, help="Confidence level of the intervals")
+    parser.add_argument('--json', default=None, help="Write the preview to this JSON file")
+    args = parser.parse_args(argv)
+
+    preview = preview_quality(args.input, args.sample, args.method, args.seed, args.confidence)
+    print(render_text(preview))
+    if args.json:
+        with open(args.json, 'w') as handle:
+            json.dump(preview, handle, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(_main())
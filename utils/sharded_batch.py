@@ -0,0 +1,429 @@
+"""
+Sharded Batch Validation
+Coordinator/worker mode for validating very large input files across several
+processes or machines. The coordinator splits the input into newline-aligned
+byte ranges and publishes one task file per shard in a shared work directory;
+workers claim tasks by atomic rename, run the checker over their byte range
+and publish a CSV part. Stale claims (no heartbeat) and failed shards are
+retried, and the parts are concatenated in shard order at the end. Each part
+also ships the 64-bit hashes of its E.164 numbers, so the coordinator can flag
+duplicates across shards while merging without holding any numbers in memory.
+
+Work directory layout:
+    tasks/    shard-00000.json            waiting to be claimed
+    running/  shard-00000.json@<worker>   claimed; mtime is the heartbeat
+    failed/   shard-00000.json            last error, picked up for retry
+    parts/    shard-00000.csv             finished output (no header)
+              shard-00000.agg.json        summary counters for the shard
+              shard-00000.hashes.npy      E.164 hashes, one per row
+    STOP                                  written when the job is complete
+
+Usage:
+    python -m utils.sharded_batch coordinator INPUT OUTPUT --workdir DIR [--shards 16] [--local-workers 4]
+    python -m utils.sharded_batch worker --workdir DIR
+"""
+
+import argparse
+import csv
+import json
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+from utils.duplicate_detection import DUPLICATE_FIELDS, DuplicateTracker, hash_numbers
+from utils.phone_checker import RESULT_FIELDS, VERSION_FIELD, check_phone, get_checker_version
+from utils.validation_aggregates import ValidationAggregate
+
+TASK_DIRS = ("tasks", "running", "failed", "parts")
+STOP_FILE = "STOP"
+HEARTBEAT_EVERY_ROWS = 1000
+# E.164 numbers held before hashing them into the shard's hash array
+HASH_BLOCK_ROWS = 10000
+
+
+def _shard_name(index):
+    return f"shard-{index:05d}"
+
+
+def plan_shards(input_path, shard_count=None, shard_size_bytes=64 * 1024 * 1024):
+    """
+    Split a file into newline-aligned byte ranges
+
+    Args:
+        input_path (str or Path): Input file, one phone number per line
+        shard_count (int): Number of shards (overrides shard_size_bytes)
+        shard_size_bytes (int): Approximate shard size when shard_count is not given
+
+    Returns:
+        list: [(index, start, end), ...] covering the whole file, end exclusive
+    """
+    input_path = Path(input_path)
+    file_size = input_path.stat().st_size
+    if file_size == 0:
+        return []
+
+    if shard_count:
+        shard_size_bytes = max(1, -(-file_size // shard_count))
+
+    boundaries = [0]
+    with open(input_path, 'rb') as handle:
+        position = shard_size_bytes
+        while position < file_size:
+            handle.seek(position)
+            handle.readline()  # finish the line this offset falls in
+            boundary = handle.tell()
+            if boundary >= file_size:
+                break
+            if boundary > boundaries[-1]:
+                boundaries.append(boundary)
+            position = boundary + shard_size_bytes
+    boundaries.append(file_size)
+
+    return [
+        (index, start, end)
+        for index, (start, end) in enumerate(zip(boundaries, boundaries[1:]))
+    ]
+
+
+def iter_shard_lines(input_path, start, end):
+    """Yield the stripped, non-empty lines whose first byte lies in [start, end)"""
+    with open(input_path, 'rb') as handle:
+        handle.seek(start)
+        while handle.tell() < end:
+            line = handle.readline()
+            if not line:
+                break
+            text = line.decode('utf-8', errors='replace').strip()
+            if text:
+                yield text
+
+
+def validate_shard(task, out, heartbeat=None, check=check_phone, rules_version=None):
+    """
+    Validate one shard, streaming its CSV part (no header) to `out`
+
+    Rows are written as they are checked and E.164 numbers are hashed in
+    blocks of HASH_BLOCK_ROWS, so memory stays flat whatever the shard size.
+
+    Args:
+        task (dict): Task spec with 'input', 'start' and 'end'
+        out (file): Text file the part rows are written to (opened with newline='')
+        heartbeat (callable): Called every HEARTBEAT_EVERY_ROWS rows
+        check (callable): Per-number checker returning a result dict
+        rules_version (str): Stamped on every row (defaults to get_checker_version(),
+            which matches the default check)
+
+    Returns:
+        tuple: (row_count, aggregate, hashes of the rows' E.164 numbers)
+    """
+    rules_version = rules_version or get_checker_version()
+    writer = csv.writer(out, quoting=csv.QUOTE_NONNUMERIC)
+    aggregate = ValidationAggregate()
+    hash_blocks = []
+    block = []
+    row_count = 0
+    for phone in iter_shard_lines(task['input'], task['start'], task['end']):
+        row = check(phone)
+        writer.writerow([row[field] for field in RESULT_FIELDS] + [rules_version])
+        aggregate.add(row)
+        block.append(row['e164'])
+        row_count += 1
+        if len(block) == HASH_BLOCK_ROWS:
+            hash_blocks.append(hash_numbers(block))
+            block = []
+        if heartbeat and row_count % HEARTBEAT_EVERY_ROWS == 0:
+            heartbeat()
+    hash_blocks.append(hash_numbers(block))
+    return row_count, aggregate, np.concatenate(hash_blocks)
+
+
+def _write_json_atomic(path, payload):
+    tmp_path = path.with_name(path.name + f".tmp{os.getpid()}")
+    tmp_path.write_text(json.dumps(payload))
+    os.replace(tmp_path, path)
+
+
+def _claim_task(workdir, worker_id):
+    """Claim the lowest-numbered waiting task, or return None"""
+    for task_path in sorted((workdir / "tasks").glob("shard-*.json")):
+        claimed_path = workdir / "running" / f"{task_path.name}@{worker_id}"
+        try:
+            os.rename(task_path, claimed_path)
+        except FileNotFoundError:
+            continue  # another worker won the race
+        return claimed_path
+    return None
+
+
+def run_worker(workdir, worker_id=None, poll_interval=0.5, check=check_phone):
+    """
+    Claim and process shards until the coordinator writes the STOP file
+
+    Args:
+        workdir (str or Path): Shared work directory
+        worker_id (str): Name used in claim files (defaults to host-pid)
+        poll_interval (float): Seconds to wait when no task is available
+        check (callable): Per-number checker returning a result dict
+
+    Returns:
+        dict: {'worker_id': str, 'shards': int, 'rows': int, 'failures': int}
+    """
+    workdir = Path(workdir)
+    worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+    stats = {'worker_id': worker_id, 'shards': 0, 'rows': 0, 'failures': 0}
+
+    while True:
+        claimed_path = _claim_task(workdir, worker_id)
+        if claimed_path is None:
+            if (workdir / STOP_FILE).exists():
+                return stats
+            time.sleep(poll_interval)
+            continue
+
+        task = json.loads(claimed_path.read_text())
+        shard_name = _shard_name(task['index'])
+
+        def heartbeat():
+            try:
+                os.utime(claimed_path)
+            except FileNotFoundError:
+                pass  # lease expired and the coordinator requeued the shard
+
+        part_path = workdir / "parts" / f"{shard_name}.csv"
+        tmp_path = part_path.with_name(part_path.name + f".tmp{os.getpid()}")
+        try:
+            with open(tmp_path, 'w', encoding='utf-8', newline='') as part:
+                row_count, aggregate, hashes = validate_shard(task, part, heartbeat=heartbeat, check=check)
+            # Aggregate and hashes land first: a visible CSV part means the shard is complete
+            _write_json_atomic(workdir / "parts" / f"{shard_name}.agg.json", aggregate.to_dict())
+            hashes_path = workdir / "parts" / f"{shard_name}.hashes.npy"
+            tmp_hashes_path = hashes_path.with_name(hashes_path.name + f".tmp{os.getpid()}")
+            with open(tmp_hashes_path, 'wb') as handle:
+                np.save(handle, hashes)
+            os.replace(tmp_hashes_path, hashes_path)
+            os.replace(tmp_path, part_path)
+            stats['shards'] += 1
+            stats['rows'] += row_count
+        except Exception as e:
+            stats['failures'] += 1
+            tmp_path.unlink(missing_ok=True)
+            task['error'] = f"{type(e).__name__}: {str(e)}"
+            task['worker_id'] = worker_id
+            _write_json_atomic(workdir / "failed" / f"{shard_name}.json", task)
+
+        try:
+            claimed_path.unlink()
+        except FileNotFoundError:
+            pass
+
+
+def _prepare_workdir(workdir):
+    if workdir.exists() and any(workdir.iterdir()):
+        raise ValueError(f"Work directory {workdir} is not empty; use a fresh directory per job")
+    for name in TASK_DIRS:
+        (workdir / name).mkdir(parents=True, exist_ok=True)
+
+
+def _spawn_local_workers(workdir, count):
+    repo_root = Path(__file__).resolve().parent.parent
+    return [
+        subprocess.Popen(
+            [sys.executable, "-m", "utils.sharded_batch", "worker",
+             "--workdir", str(workdir), "--worker-id", f"local-{number}"],
+            cwd=repo_root,
+        )
+        for number in range(count)
+    ]
+
+
+def run_coordinator(input_path, output_path, workdir, shard_count=None,
+                    shard_size_bytes=64 * 1024 * 1024, local_workers=0,
+                    max_attempts=3, lease_timeout=120.0, poll_interval=0.5):
+    """
+    Shard an input file, wait for workers to validate every shard, and merge the parts
+
+    Args:
+        input_path (str or Path): Input file, one phone number per line
+        output_path (str or Path): Merged CSV output (with header), including
+            rules_version, and is_duplicate_row and first_seen_index resolved
+            across all shards
+        workdir (str or Path): Shared work directory; must be empty or missing
+        shard_count (int): Number of shards (overrides shard_size_bytes)
+        shard_size_bytes (int): Approximate shard size in bytes
+        local_workers (int): Worker processes to spawn on this machine
+        max_attempts (int): Attempts per shard before the job fails
+        lease_timeout (float): Seconds without a heartbeat before a claim is requeued
+        poll_interval (float): Seconds between progress checks
+
+    Returns:
+        dict: {
+            'shards': int,
+            'rows': int,
+            'retries': int,
+            'elapsed_seconds': float,
+            'aggregate': ValidationAggregate (merged summary counters; duplicate
+                rows are counted in the totals only),
+            'distinct_numbers': int
+        }
+
+    Raises:
+        RuntimeError: If a shard fails max_attempts times
+    """
+    started = time.perf_counter()
+    input_path = Path(input_path).resolve()
+    output_path = Path(output_path)
+    workdir = Path(workdir)
+    _prepare_workdir(workdir)
+
+    shards = plan_shards(input_path, shard_count, shard_size_bytes)
+    for index, start, end in shards:
+        _write_json_atomic(
+            workdir / "tasks" / f"{_shard_name(index)}.json",
+            {'index': index, 'input': str(input_path), 'start': start, 'end': end, 'attempt': 1}
+        )
+
+    processes = _spawn_local_workers(workdir, local_workers)
+    retries = 0
+
+    try:
+        while True:
+            finished = {path.stem for path in (workdir / "parts").glob("shard-*.csv")}
+            if len(finished) == len(shards):
+                break
+
+            # Failed shards go back to the queue until they run out of attempts
+            for failed_path in (workdir / "failed").glob("shard-*.json"):
+                task = json.loads(failed_path.read_text())
+                failed_path.unlink()
+                if _shard_name(task['index']) in finished:
+                    continue
+                if task['attempt'] >= max_attempts:
+                    raise RuntimeError(
+                        f"Shard {task['index']} failed {task['attempt']} times; last error: {task['error']}"
+                    )
+                task['attempt'] += 1
+                task.pop('error', None)
+                retries += 1
+                _write_json_atomic(workdir / "tasks" / f"{_shard_name(task['index'])}.json", task)
+
+            # Claims whose worker stopped heartbeating are requeued
+            now = time.time()
+            for claimed_path in (workdir / "running").glob("shard-*.json@*"):
+                try:
+                    is_stale = now - claimed_path.stat().st_mtime > lease_timeout
+                    if not is_stale:
+                        continue
+                    task = json.loads(claimed_path.read_text())
+                    claimed_path.unlink()
+                except FileNotFoundError:
+                    continue  # finished or failed while we looked
+                if _shard_name(task['index']) in finished:
+                    continue
+                task['attempt'] += 1
+                retries += 1
+                _write_json_atomic(workdir / "tasks" / f"{_shard_name(task['index'])}.json", task)
+
+            if processes and all(process.poll() is not None for process in processes):
+                raise RuntimeError("All local workers exited before the job finished")
+
+            time.sleep(poll_interval)
+
+        # Concatenate parts in shard order behind a single header, resolving
+        # duplicates in the same order so first_seen_index is the global row index
+        aggregate = ValidationAggregate()
+        tracker = DuplicateTracker()
+        row_count = 0
+        duplicate_count = 0
+        tmp_output = output_path.with_name(output_path.name + f".tmp{os.getpid()}")
+        with open(tmp_output, 'w', encoding='utf-8', newline='') as out:
+            csv.writer(out, quoting=csv.QUOTE_NONNUMERIC).writerow(RESULT_FIELDS + [VERSION_FIELD] + DUPLICATE_FIELDS)
+            for index, _, _ in shards:
+                shard_name = _shard_name(index)
+                is_duplicate, first_seen = tracker.process_hashes(
+                    np.load(workdir / "parts" / f"{shard_name}.hashes.npy")
+                )
+                duplicate_count += int(is_duplicate.sum())
+                flags = zip(is_duplicate.tolist(), first_seen.tolist())
+                with open(workdir / "parts" / f"{shard_name}.csv", encoding='utf-8', newline='') as part:
+                    for line, (duplicate, first) in zip(part, flags):
+                        row_text = line.rstrip("\r\n")
+                        out.write(f"{row_text},{duplicate},{first}\r\n")
+                        row_count += 1
+                with open(workdir / "parts" / f"{shard_name}.agg.json") as agg_file:
+                    aggregate.merge(ValidationAggregate.from_dict(json.load(agg_file)))
+        os.replace(tmp_output, output_path)
+        aggregate.totals['duplicate_row'] += duplicate_count
+    finally:
+        (workdir / STOP_FILE).touch()
+        for process in processes:
+            try:
+                process.wait(timeout=max(poll_interval * 4, 5))
+            except subprocess.TimeoutExpired:
+                process.kill()
+
+    return {
+        'shards': len(shards),
+        'rows': row_count,
+        'retries': retries,
+        'elapsed_seconds': time.perf_counter() - started,
+        'aggregate': aggregate,
+        'distinct_numbers': tracker.distinct_count
+    }
+
+
+def _main(argv=None):
+    parser = argparse.ArgumentParser(description="Sharded coordinator/worker batch validation")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    coordinator_parser = subparsers.add_parser('coordinator', help="Shard an input file and merge results")
+    coordinator_parser.add_argument('input', help="Input file, one phone number per line")
+    coordinator_parser.add_argument('output', help="Merged CSV output")
+    coordinator_parser.add_argument('--workdir', required=True, help="Shared work directory (empty or missing)")
+    coordinator_parser.add_argument('--shards', type=int, default=None, help="Number of shards")
+    coordinator_parser.add_argument('--shard-size-mb', type=float, default=64, help="Shard size when --shards is not given")
+    coordinator_parser.add_argument('--local-workers', type=int, default=0, help="Worker processes to spawn locally")
+    coordinator_parser.add_argument('--max-attempts', type=int, default=3, help="Attempts per shard")
+    coordinator_parser.add_argument('--lease-timeout', type=float, default=120, help="Seconds before a silent claim is requeued")
+    coordinator_parser.add_argument('--keep-workdir', action='store_true', help="Keep parts after merging")
+    coordinator_parser.add_argument('--report', default=None, help="Write the merged aggregate to this JSON file")
+
+    worker_parser = subparsers.add_parser('worker', help="Process shards from a work directory")
+    worker_parser.add_argument('--workdir', required=True, help="Shared work directory")
+    worker_parser.add_argument('--worker-id', default=None, help="Worker name (defaults to host-pid)")
+
+    args = parser.parse_args(argv)
+
+    if args.command == 'worker':
+        stats = run_worker(args.workdir, worker_id=args.worker_id)
+        print(f"Worker {stats['worker_id']}: {stats['shards']} shards, "
+              f"{stats['rows']:,} rows, {stats['failures']} failures", file=sys.stderr)
+        return 0
+
+    summary = run_coordinator(
+        args.input, args.output, args.workdir,
+        shard_count=args.shards,
+        shard_size_bytes=int(args.shard_size_mb * 1024 * 1024),
+        local_workers=args.local_workers,
+        max_attempts=args.max_attempts,
+        lease_timeout=args.lease_timeout,
+    )
+    if not args.keep_workdir:
+        shutil.rmtree(args.workdir, ignore_errors=True)
+    if args.report:
+        with open(args.report, 'w') as handle:
+            json.dump(summary['aggregate'].to_dict(), handle)
+    print(summary['aggregate'].render_text())
+    print()
+    print(f"Validated {summary['rows']:,} rows ({summary['distinct_numbers']:,} distinct numbers) "
+          f"in {summary['shards']} shards ({summary['retries']} retries) in {summary['elapsed_seconds']:.1f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(_main())
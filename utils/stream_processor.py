@@ -0,0 +1,293 @@
+"""
+NDJSON Stream Processor
+Long-running validator for data pipelines. Reads NDJSON records (or bare
+phone numbers, one per line) from stdin or a local TCP socket, validates them
+with the same checks as the app, and writes one NDJSON result per non-empty input
+line, in input order. Records are micro-batched by size or time window to amortize
+per-call overhead while keeping each record's latency under a target, and
+periodic stats lines (throughput, queue depth, latency percentiles) go to
+stderr; the final one also carries the summary counts for the whole stream.
+
+Usage:
+    producer | python -m utils.stream_processor [--field phone] [--batch-size 500] [--max-latency-ms 50]
+    python -m utils.stream_processor --listen 127.0.0.1:9000
+"""
+
+import argparse
+import json
+import queue
+import socketserver
+import sys
+import threading
+import time
+from functools import lru_cache
+
+from utils.phone_checker import check_phone
+from utils.validation_aggregates import ValidationAggregate
+
+_END_OF_STREAM = object()
+
+
+def _percentile(sorted_values, percent):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, int(round((len(sorted_values) - 1) * percent / 100)))
+    return sorted_values[index]
+
+
+class StreamStats:
+    """Counters and latency samples for the current stats window"""
+
+    def __init__(self, label=None):
+        self.label = label
+        self.total_records = 0
+        self.total_errors = 0
+        self._window_started = time.perf_counter()
+        self._window_records = 0
+        self._window_batches = 0
+        self._latencies_ms = []
+
+    def record_batch(self, latencies_ms, errors):
+        self.total_records += len(latencies_ms)
+        self.total_errors += errors
+        self._window_records += len(latencies_ms)
+        self._window_batches += 1
+        self._latencies_ms.extend(latencies_ms)
+
+    def snapshot(self, queue_depth):
+        """Summarize and reset the current window"""
+        now = time.perf_counter()
+        elapsed = now - self._window_started
+        latencies = sorted(self._latencies_ms)
+        stats = {
+            'records': self._window_records,
+            'total_records': self.total_records,
+            'errors': self.total_errors,
+            'throughput_rps': round(self._window_records / elapsed, 1) if elapsed > 0 else 0.0,
+            'queue_depth': queue_depth,
+            'batches': self._window_batches,
+            'avg_batch_size': round(self._window_records / self._window_batches, 1) if self._window_batches else 0.0,
+            'latency_ms': {
+                'p50': _percentile(latencies, 50),
+                'p95': _percentile(latencies, 95),
+                'p99': _percentile(latencies, 99),
+                'max': latencies[-1] if latencies else None,
+            },
+        }
+        if self.label:
+            stats['stream'] = self.label
+        self._window_started = now
+        self._window_records = 0
+        self._window_batches = 0
+        self._latencies_ms = []
+        return stats
+
+
+def make_line_validator(field="phone", check=check_phone, cache_size=65536):
+    """
+    Build a function that turns one input line into one NDJSON output line
+
+    JSON object lines are validated on their `field` value and echoed back
+    under "record"; any other non-empty line is treated as a bare number.
+    Serialized results are cached, so repeated numbers cost a dict lookup.
+
+    Returns:
+        callable: validate(line) -> (output_line, result_row or None on error)
+    """
+    @lru_cache(maxsize=cache_size)
+    def validate_number(phone):
+        row = check(phone)
+        return json.dumps(row), row
+
+    def validate(line):
+        text = line.strip()
+        if text.startswith("{"):
+            try:
+                record = json.loads(text)
+                phone = str(record[field]).strip()
+            except (ValueError, KeyError, TypeError) as e:
+                error = f"{type(e).__name__}: {str(e)}"
+                return json.dumps({"error": error, "line": text}), None
+            output, row = validate_number(phone)
+            return '{"record": ' + json.dumps(record) + ', ' + output[1:], row
+        return validate_number(text)
+
+    return validate
+
+
+def process_stream(lines, write, flush=None, batch_size=500, max_latency_ms=50.0,
+                   stats_interval=10.0, stats_out=None, field="phone", check=check_phone,
+                   queue_size=10000, label=None):
+    """
+    Validate a stream of lines with size/time micro-batching and ordered output
+
+    A reader thread feeds a bounded queue (so a slow consumer pushes back on the
+    producer); the calling thread drains it in batches. A batch is flushed when
+    it reaches `batch_size` or when its oldest record has waited half of
+    `max_latency_ms`, leaving the other half for validation and the write.
+
+    Args:
+        lines (iterable): Input lines (e.g., sys.stdin)
+        write (callable): Receives each batch of output as one string
+        flush (callable): Called after each batch write (e.g., sys.stdout.flush)
+        batch_size (int): Maximum records per batch
+        max_latency_ms (float): Per-record latency target
+        stats_interval (float): Seconds between stats lines (0 disables them)
+        stats_out (file): Destination of stats lines (defaults to sys.stderr)
+        field (str): JSON field holding the phone number
+        check (callable): Per-number checker returning a result dict
+        queue_size (int): Maximum records buffered ahead of validation
+        label (str): Stream name included in stats lines
+
+    Returns:
+        dict: Final stats window, including totals and the stream's summary counts
+    """
+    stats_out = stats_out or sys.stderr
+    validate = make_line_validator(field=field, check=check)
+    stats = StreamStats(label=label)
+    aggregate = ValidationAggregate()
+    pending_queue = queue.Queue(maxsize=queue_size)
+    flush_window = max_latency_ms / 2000.0
+
+    def read():
+        try:
+            for line in lines:
+                if line.strip():
+                    pending_queue.put((time.perf_counter(), line))
+        finally:
+            pending_queue.put(_END_OF_STREAM)
+
+    reader = threading.Thread(target=read, name="stream-reader", daemon=True)
+    reader.start()
+
+    def emit_stats():
+        stats_out.write(json.dumps({"stats": stats.snapshot(pending_queue.qsize())}) + "\n")
+        stats_out.flush()
+
+    def flush_batch(batch):
+        outputs = []
+        errors = 0
+        for _, line in batch:
+            output, row = validate(line)
+            outputs.append(output)
+            if row is None:
+                errors += 1
+            else:
+                aggregate.add(row)
+        write("\n".join(outputs) + "\n")
+        if flush:
+            flush()
+        done = time.perf_counter()
+        stats.record_batch([(done - arrived) * 1000 for arrived, _ in batch], errors)
+
+    batch = []
+    next_stats = time.perf_counter() + stats_interval if stats_interval else None
+    while True:
+        now = time.perf_counter()
+        deadlines = []
+        if batch:
+            deadlines.append(batch[0][0] + flush_window)
+        if next_stats is not None:
+            deadlines.append(next_stats)
+        timeout = max(0.0, min(deadlines) - now) if deadlines else None
+
+        try:
+            item = pending_queue.get(timeout=timeout)
+        except queue.Empty:
+            item = None
+
+        # Take whatever is already queued too, so a backlog is drained in full batches
+        finished = False
+        while item is not None:
+            if item is _END_OF_STREAM:
+                finished = True
+                break
+            batch.append(item)
+            if len(batch) >= batch_size:
+                break
+            try:
+                item = pending_queue.get_nowait()
+            except queue.Empty:
+                item = None
+
+        if finished:
+            if batch:
+                flush_batch(batch)
+            break
+
+        now = time.perf_counter()
+        if batch and (len(batch) >= batch_size or now >= batch[0][0] + flush_window):
+            flush_batch(batch)
+            batch = []
+        if next_stats is not None and now >= next_stats:
+            emit_stats()
+            next_stats = now + stats_interval
+
+    final = stats.snapshot(pending_queue.qsize())
+    final['summary'] = aggregate.summary()
+    if stats_interval:
+        stats_out.write(json.dumps({"stats": final, "final": True}) + "\n")
+        stats_out.flush()
+    return final
+
+
+def serve(host, port, **options):
+    """
+    Accept TCP connections and run an independent ordered stream per connection
+
+    Each connection's results are written back on the same socket.
+
+    Args:
+        host (str): Interface to bind (use 127.0.0.1 for local-only access)
+        port (int): TCP port
+        **options: Passed through to process_stream
+    """
+    class StreamHandler(socketserver.StreamRequestHandler):
+        def handle(self):
+            peer = "{}:{}".format(*self.client_address[:2])
+            process_stream(
+                (raw.decode('utf-8', errors='replace') for raw in self.rfile),
+                lambda text: self.wfile.write(text.encode('utf-8')),
+                flush=self.wfile.flush,
+                label=peer,
+                **options
+            )
+
+    class ThreadedServer(socketserver.ThreadingMixIn, socketserver.TCPServer):
+        daemon_threads = True
+        allow_reuse_address = True
+
+    with ThreadedServer((host, port), StreamHandler) as server:
+        print(f"Listening on {host}:{port}", file=sys.stderr)
+        server.serve_forever()
+
+
+def _main(argv=None):
+    parser = argparse.ArgumentParser(description="Validate NDJSON records or bare numbers from a stream")
+    parser.add_argument('--listen', default=None, help="HOST:PORT to accept TCP streams instead of stdin")
+    parser.add_argument('--field', default="phone", help="JSON field holding the phone number")
+    parser.add_argument('--batch-size', type=int, default=500, help="Maximum records per batch")
+    parser.add_argument('--max-latency-ms', type=float, default=50.0, help="Per-record latency target")
+    parser.add_argument('--stats-interval', type=float, default=10.0, help="Seconds between stats lines (0 = off)")
+    parser.add_argument('--queue-size', type=int, default=10000, help="Records buffered ahead of validation")
+    args = parser.parse_args(argv)
+
+    options = {
+        'batch_size': args.batch_size,
+        'max_latency_ms': args.max_latency_ms,
+        'stats_interval': args.stats_interval,
+        'field': args.field,
+        'queue_size': args.queue_size,
+    }
+
+    if args.listen:
+        host, _, port = args.listen.rpartition(":")
+        serve(host or "127.0.0.1", int(port), **options)
+        return 0
+
+    process_stream(sys.stdin, sys.stdout.write, flush=sys.stdout.flush, **options)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(_main())
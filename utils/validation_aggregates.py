@@ -0,0 +1,177 @@
+"""
+Validation Aggregates
+Running counters over validation results, updated as rows are produced so a
+quality report never needs the full result set in memory. Aggregates from
+different chunks, shards or stream workers merge by simple addition and
+serialize to JSON for hand-off between processes.
+
+Merge saved aggregates and print the report:
+    python -m utils.validation_aggregates part1.json part2.json [--top 20]
+"""
+
+import argparse
+import json
+import sys
+from collections import Counter, defaultdict
+
+# Summary metrics, in the order the app displays them
+SUMMARY_METRICS = [
+    ("total", "Total"),
+    ("invalid_format", "Invalid Format"),
+    ("invalid_length", "Invalid Length"),
+    ("duplicate_code", "Duplicate Code"),
+    ("tollfree", "Toll-Free"),
+    ("suspicious", "Suspicious"),
+    ("duplicate_row", "Duplicate Rows"),
+    ("valid", "Valid"),
+]
+
+BREAKDOWN_FIELDS = ("region_code", "carrier")
+
+
+def row_metrics(row):
+    """
+    Get the summary metrics a single result row counts towards
+
+    Args:
+        row (dict): Result row from check_phone, optionally with duplicate flags
+
+    Returns:
+        list: Metric keys from SUMMARY_METRICS
+    """
+    metrics = ["total"]
+    metrics.append("valid" if row.get("is_valid") else "invalid_format")
+    if row.get("is_valid_length") is False:
+        metrics.append("invalid_length")
+    if row.get("has_duplicate_code"):
+        metrics.append("duplicate_code")
+    if row.get("is_tollfree"):
+        metrics.append("tollfree")
+    if row.get("is_suspicious"):
+        metrics.append("suspicious")
+    if row.get("is_duplicate_row"):
+        metrics.append("duplicate_row")
+    return metrics
+
+
+class ValidationAggregate:
+    """Mergeable summary counters, overall and per region code and carrier"""
+
+    def __init__(self):
+        self.totals = Counter()
+        self.breakdowns = {field: defaultdict(Counter) for field in BREAKDOWN_FIELDS}
+
+    def add(self, row):
+        """Count one result row"""
+        metrics = row_metrics(row)
+        self.totals.update(metrics)
+        for field in BREAKDOWN_FIELDS:
+            self.breakdowns[field][row.get(field) or "Unknown"].update(metrics)
+
+    def add_rows(self, rows):
+        """Count an iterable of result rows"""
+        for row in rows:
+            self.add(row)
+        return self
+
+    def merge(self, other):
+        """Add another aggregate's counts into this one"""
+        self.totals.update(other.totals)
+        for field in BREAKDOWN_FIELDS:
+            for key, counts in other.breakdowns[field].items():
+                self.breakdowns[field][key].update(counts)
+        return self
+
+    def summary(self):
+        """
+        Get the overall counts
+
+        Returns:
+            dict: {metric_key: int} for every metric in SUMMARY_METRICS
+        """
+        return {key: self.totals.get(key, 0) for key, _ in SUMMARY_METRICS}
+
+    def breakdown(self, field="region_code", top=None):
+        """
+        Get per-group counts, largest groups first
+
+        Args:
+            field (str): 'region_code' or 'carrier'
+            top (int): Keep only the largest groups
+
+        Returns:
+            list: Dicts with the group value, every metric and an invalid share
+        """
+        rows = []
+        for key, counts in self.breakdowns[field].items():
+            row = {field: key}
+            row.update({metric: counts.get(metric, 0) for metric, _ in SUMMARY_METRICS})
+            row["invalid_pct"] = round(100 * row["invalid_format"] / row["total"], 1) if row["total"] else 0.0
+            rows.append(row)
+        rows.sort(key=lambda row: (-row["total"], str(row[field])))
+        return rows[:top] if top else rows
+
+    def to_dict(self):
+        """JSON-serializable form (see from_dict)"""
+        return {
+            "totals": dict(self.totals),
+            "breakdowns": {
+                field: {key: dict(counts) for key, counts in groups.items()}
+                for field, groups in self.breakdowns.items()
+            },
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        """Rebuild an aggregate saved with to_dict"""
+        aggregate = cls()
+        aggregate.totals.update(data.get("totals", {}))
+        for field in BREAKDOWN_FIELDS:
+            for key, counts in data.get("breakdowns", {}).get(field, {}).items():
+                aggregate.breakdowns[field][key].update(counts)
+        return aggregate
+
+    def render_text(self, top=20):
+        """Plain-text quality report with the overall summary and per-group tables"""
+        lines = ["Validation Quality Report", "=" * 92]
+        summary = self.summary()
+        total = summary["total"]
+        for key, label in SUMMARY_METRICS:
+            share = f" ({100 * summary[key] / total:.1f}%)" if total and key != "total" else ""
+            lines.append(f"{label + ':':<17}{summary[key]:>12,}{share}")
+
+        headers = ["Total", "Invalid", "Bad Len", "Dup Code", "Toll-Free", "Suspic.", "Invalid %"]
+        metrics = ["total", "invalid_format", "invalid_length", "duplicate_code", "tollfree", "suspicious"]
+        for field, title in (("region_code", "Region"), ("carrier", "Carrier")):
+            lines.append("")
+            lines.append(f"By {title} (top {top})")
+            lines.append("-" * 92)
+            lines.append(f"{title:<22}" + "".join(f"{header:>10}" for header in headers))
+            for row in self.breakdown(field, top=top):
+                name = str(row[field])[:21]
+                lines.append(f"{name:<22}" + "".join(f"{row[metric]:>10,}" for metric in metrics)
+                             + f"{row['invalid_pct']:>9.1f}%")
+        return "\n".join(lines)
+
+
+def _main(argv=None):
+    parser = argparse.ArgumentParser(description="Merge saved validation aggregates and print a quality report")
+    parser.add_argument('paths', nargs='+', help="Aggregate JSON files (from to_dict)")
+    parser.add_argument('--top', type=int, default=20, help="Groups shown per breakdown")
+    parser.add_argument('--output', default=None, help="Write the merged aggregate to this JSON file")
+    args = parser.parse_args(argv)
+
+    merged = ValidationAggregate()
+    for path in args.paths:
+        with open(path) as handle:
+            merged.merge(ValidationAggregate.from_dict(json.load(handle)))
+
+    print(merged.render_text(top=args.top))
+    if args.output:
+        with open(args.output, 'w') as handle:
+            json.dump(merged.to_dict(), handle)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(_main())
@@ -0,0 +1,361 @@
+"""
+Validation Backends
+Everything the checker needs to know about a number - parsing, validity,
+number type, region, formatting and enrichment - goes through a backend, so
+the phonenumbers library is one implementation rather than a hard dependency
+of the checks.
+
+- PhonenumbersBackend ('phonenumbers', the default): libphonenumber metadata
+  plus carrier, timezone and country-name enrichment
+- CompiledTableBackend ('compiled'): answers validity, region, length and
+  toll-free from the compiled metadata snapshot alone; speed over detail, with
+  no carrier or timezone data, plain formatting and no support for
+  non-geographic numbers or inputs with letters or extensions
+
+The default backend can be set with PHONE_VALIDATOR_BACKEND; compare_backends
+reports how often two backends agree on the same inputs.
+"""
+
+import os
+import re
+import time
+from collections import Counter, namedtuple
+from functools import lru_cache
+
+# Backend used when none is passed explicitly
+BACKEND_ENV = "PHONE_VALIDATOR_BACKEND"
+DEFAULT_BACKEND = "phonenumbers"
+
+# Number types shared by all backends (lower-case libphonenumber type names)
+TOLL_FREE = "toll_free"
+UNKNOWN_TYPE = "unknown"
+
+# Result fields both backends answer; used by compare_backends
+COMPARED_FIELDS = [
+    "is_valid",
+    "region_code",
+    "e164",
+    "is_valid_length",
+    "actual_length",
+    "has_duplicate_code",
+    "is_tollfree",
+    "is_suspicious",
+]
+
+# A parsed number: calling code (int), national significant number (str)
+# and the backend's own parse object
+ParsedNumber = namedtuple("ParsedNumber", ["country_code", "national_number", "raw"])
+
+
+class ValidationBackend:
+    """
+    Interface implemented by every validation backend
+
+    parse() raises ValueError (or the library's own parse error) for input
+    that is not a phone number; every other method takes its ParsedNumber.
+    """
+
+    name = None
+
+    def preload(self):
+        """Load lookup tables that are otherwise imported on first use"""
+
+    def parse(self, phone_input):
+        """Parse an international number ('+' and country code included)"""
+        raise NotImplementedError
+
+    def is_valid(self, parsed):
+        """Check whether the number is valid for its region"""
+        raise NotImplementedError
+
+    def number_type(self, parsed):
+        """Get the number type (TOLL_FREE, 'mobile', ... or UNKNOWN_TYPE)"""
+        raise NotImplementedError
+
+    def region_code(self, parsed):
+        """Get the ISO region code the number belongs to, or None"""
+        raise NotImplementedError
+
+    def format(self, parsed, style):
+        """Format the number as 'e164' or 'international'"""
+        raise NotImplementedError
+
+    def enrich(self, parsed, region_code):
+        """
+        Look up display information for a number
+
+        Returns:
+            dict: {'country': str or None, 'carrier': str or None, 'timezone': str}
+        """
+        raise NotImplementedError
+
+
+class PhonenumbersBackend(ValidationBackend):
+    """Backend built on the phonenumbers library (libphonenumber metadata)"""
+
+    name = "phonenumbers"
+
+    def __init__(self):
+        import phonenumbers
+        from phonenumbers import carrier, timezone
+
+        self._phonenumbers = phonenumbers
+        self._carrier = carrier
+        self._timezone = timezone
+
+    def parse(self, phone_input):
+        parsed_number = self._phonenumbers.parse(phone_input, None)
+        return ParsedNumber(parsed_number.country_code, str(parsed_number.national_number), parsed_number)
+
+    def is_valid(self, parsed):
+        return self._phonenumbers.is_valid_number(parsed.raw)
+
+    def number_type(self, parsed):
+        return self._phonenumbers.PhoneNumberType.to_string(self._phonenumbers.number_type(parsed.raw)).lower()
+
+    def region_code(self, parsed):
+        return self._phonenumbers.region_code_for_number(parsed.raw)
+
+    def format(self, parsed, style):
+        number_format = {
+            'e164': self._phonenumbers.PhoneNumberFormat.E164,
+            'international': self._phonenumbers.PhoneNumberFormat.INTERNATIONAL,
+        }[style]
+        return self._phonenumbers.format_number(parsed.raw, number_format)
+
+    def preload(self):
+        from phonenumbers import geocoder  # noqa: F401
+
+    def _geo_description(self, parsed):
+        # Imported on first use unless preloaded: the geocoder loads prefix
+        # tables for every region (~100 MB)
+        from phonenumbers import geocoder
+
+        return geocoder.description_for_number(parsed.raw, "en")
+
+    def enrich(self, parsed, region_code):
+        import pycountry
+
+        try:
+            country_obj = pycountry.countries.get(alpha_2=region_code)
+            country = country_obj.name if country_obj else self._geo_description(parsed)
+        except:
+            country = self._geo_description(parsed)
+
+        timezones = self._timezone.time_zones_for_number(parsed.raw)
+        return {
+            'country': country,
+            'carrier': self._carrier.name_for_number(parsed.raw, "en"),
+            'timezone': ", ".join(timezones) if timezones else "Unknown",
+        }
+
+
+class CompiledTableBackend(ValidationBackend):
+    """
+    Backend answering from the memory-mapped metadata snapshot alone
+
+    Validity is a full match of any of the region's number type patterns, a
+    shared calling code resolves to the first region whose leading digits or
+    type patterns match (libphonenumber's rule), and toll-free is a match of
+    the region's toll-free pattern. Carrier and timezone are not available,
+    and formatting does not group digits.
+
+    Limitations (these inputs become 'Error' rows where phonenumbers parses them):
+    - Only geographic regions are compiled, so non-geographic calling codes
+      (+800 universal freephone, +808, +870, +881-+883, +888, +979) fail to parse.
+    - Keypad letters are not translated (+1-800-FLOWERS).
+    - Extensions are not stripped (+44 20 7946 0958 ext 123).
+    benchmarks/backend_diff.py includes such inputs in its corpus, so its
+    agreement rate reflects the gap.
+    """
+
+    name = "compiled"
+
+    # Characters accepted around the digits (letters are not translated)
+    _ALLOWED_INPUT = re.compile(r"^\+[\d\s().\-/]+$")
+    _NON_DIGITS = re.compile(r"\D")
+
+    def __init__(self, snapshot_path=None):
+        from utils.metadata_snapshot import build_snapshot, load_snapshot
+
+        try:
+            snapshot = load_snapshot(snapshot_path)
+            if not snapshot.is_current():
+                raise ValueError("Snapshot is stale")
+        except (FileNotFoundError, ValueError):
+            # Missing, stale or older-format snapshots are rebuilt once
+            build_snapshot(snapshot_path)
+            load_snapshot.cache_clear()
+            snapshot = load_snapshot(snapshot_path)
+        self._snapshot = snapshot
+
+    @lru_cache(maxsize=1024)
+    def _calling_code_regions(self, country_code):
+        return tuple(self._snapshot.regions_for_dial_code(country_code))
+
+    def _matches(self, region_code, kind, national_number):
+        pattern = self._snapshot.compiled_pattern(region_code, kind)
+        return pattern is not None and pattern.fullmatch(national_number) is not None
+
+    @lru_cache(maxsize=1024)
+    def _leading_digits(self, region_code):
+        leading_digits = self._snapshot.get_region(region_code)['leading_digits']
+        return re.compile(leading_digits) if leading_digits else None
+
+    def _resolve_region(self, regions, national_number):
+        """Region for a national number, with libphonenumber's rule for shared calling codes"""
+        if len(regions) == 1:
+            return regions[0]
+        for region_code in regions:
+            leading_digits = self._leading_digits(region_code)
+            if leading_digits is not None:
+                if leading_digits.match(national_number):
+                    return region_code
+            elif self._matches(region_code, 'valid', national_number):
+                return region_code
+        return None
+
+    def parse(self, phone_input):
+        text = phone_input.strip()
+        if not self._ALLOWED_INPUT.match(text):
+            raise ValueError("The string supplied did not seem to be a phone number")
+        digits = self._NON_DIGITS.sub("", text)
+
+        for length in (1, 2, 3):
+            regions = self._calling_code_regions(int(digits[:length])) if len(digits) >= length else ()
+            if regions:
+                country_code, national_number = int(digits[:length]), digits[length:]
+                break
+        else:
+            raise ValueError("Invalid country calling code")
+
+        # Drop a national prefix written after the calling code (e.g., +44 (0)20...)
+        # unless that turns a plausible number into an implausible one
+        national_prefix = self._snapshot.get_region(regions[0])['national_prefix']
+        if national_prefix and national_number.startswith(national_prefix):
+            stripped = national_number[len(national_prefix):]
+            if (self._matches(regions[0], 'general', stripped)
+                    or not self._matches(regions[0], 'general', national_number)):
+                national_number = stripped
+
+        if len(national_number) < 2:
+            raise ValueError("The string supplied is too short to be a phone number")
+        if len(national_number) > 17:
+            raise ValueError("The string supplied is too long to be a phone number")
+
+        return ParsedNumber(country_code, national_number, self._resolve_region(regions, national_number))
+
+    def is_valid(self, parsed):
+        return parsed.raw is not None and self._matches(parsed.raw, 'valid', parsed.national_number)
+
+    def number_type(self, parsed):
+        if parsed.raw is not None and self._matches(parsed.raw, 'tollfree', parsed.national_number):
+            return TOLL_FREE
+        return UNKNOWN_TYPE
+
+    def region_code(self, parsed):
+        return parsed.raw
+
+    def format(self, parsed, style):
+        if style == 'e164':
+            return f"+{parsed.country_code}{parsed.national_number}"
+        return f"+{parsed.country_code} {parsed.national_number}"
+
+    def enrich(self, parsed, region_code):
+        record = self._snapshot.get_region(region_code) if region_code else None
+        return {
+            'country': record['name'] if record else None,
+            'carrier': None,
+            'timezone': "Unknown",
+        }
+
+
+BACKENDS = {
+    PhonenumbersBackend.name: PhonenumbersBackend,
+    CompiledTableBackend.name: CompiledTableBackend,
+}
+
+
+@lru_cache(maxsize=None)
+def get_backend(name=None):
+    """
+    Get the shared instance of a backend
+
+    Args:
+        name (str): 'phonenumbers' or 'compiled' (defaults to PHONE_VALIDATOR_BACKEND,
+            then 'phonenumbers')
+
+    Returns:
+        ValidationBackend: Backend instance, created once per process
+
+    Raises:
+        ValueError: If the name is not a known backend
+    """
+    name = name or os.environ.get(BACKEND_ENV) or DEFAULT_BACKEND
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown validation backend '{name}' (choose from {', '.join(BACKENDS)})")
+    return BACKENDS[name]()
+
+
+def compare_backends(numbers, baseline=DEFAULT_BACKEND, candidate="compiled", fields=None, examples=10):
+    """
+    Run two backends over the same inputs and report agreement and speed
+
+    Args:
+        numbers (list): Phone number inputs
+        baseline (str): Reference backend name
+        candidate (str): Backend compared against the baseline
+        fields (list): Result fields compared (defaults to COMPARED_FIELDS)
+        examples (int): Disagreeing rows kept for inspection
+
+    Returns:
+        dict: {
+            'rows': int,
+            'row_agreement_pct': float (rows agreeing on every compared field),
+            'field_agreement_pct': dict,
+            'baseline_seconds': float,
+            'candidate_seconds': float,
+            'speedup': float,
+            'disagreements': list (field-by-field values for the first mismatches)
+        }
+    """
+    from utils.phone_checker import check_phone
+
+    fields = fields or COMPARED_FIELDS
+    timings = {}
+    results = {}
+    for name in (baseline, candidate):
+        backend = get_backend(name)
+        backend.preload()
+        backend.parse("+12125550100")  # load metadata before timing
+        started = time.perf_counter()
+        results[name] = [check_phone(phone, backend=backend) for phone in numbers]
+        timings[name] = time.perf_counter() - started
+
+    field_matches = Counter()
+    rows_matching = 0
+    disagreements = []
+    for phone, expected, actual in zip(numbers, results[baseline], results[candidate]):
+        mismatched = [field for field in fields if expected[field] != actual[field]]
+        field_matches.update(field for field in fields if field not in mismatched)
+        if not mismatched:
+            rows_matching += 1
+        elif len(disagreements) < examples:
+            disagreements.append({
+                'input': phone,
+                'fields': {field: (expected[field], actual[field]) for field in mismatched},
+            })
+
+    row_count = len(numbers)
+    return {
+        'rows': row_count,
+        'row_agreement_pct': round(100 * rows_matching / row_count, 2) if row_count else 100.0,
+        'field_agreement_pct': {
+            field: round(100 * field_matches[field] / row_count, 2) if row_count else 100.0
+            for field in fields
+        },
+        'baseline_seconds': timings[baseline],
+        'candidate_seconds': timings[candidate],
+        'speedup': timings[baseline] / timings[candidate] if timings[candidate] > 0 else float('inf'),
+        'disagreements': disagreements,
+    }
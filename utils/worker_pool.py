@@ -0,0 +1,313 @@
+"""
+Shared Validation Worker Pool
+One server-wide pool of worker processes that every app session submits batch
+chunks to, instead of validating in its own script thread. Tasks wait in
+per-session queues and are dispatched round-robin across sessions, with at
+most `session_quota` running per session, so a 500k-row paste shares the
+workers with everyone else rather than starving them. Batch CPU work runs
+outside the server process, which keeps its GIL free for interactive
+single-number validations.
+
+A session's queued tasks are cancelled when it resubmits (cancel_session) or
+when the `session_alive` callback reports it gone. Chunks already running
+finish in the background and their results are dropped.
+
+Workers are spawned without the parent's __main__ module. Under
+`streamlit run`, __main__ is the app script, and a spawned worker would
+otherwise re-run the whole page as __mp_main__ (roughly doubling its memory).
+
+Usage:
+    pool = SharedWorkerPool(workers=3)
+    rows = pool.validate(session_id, numbers, backend_name="compiled")
+"""
+
+import multiprocessing
+import multiprocessing.context
+import os
+import sys
+import threading
+import types
+from collections import Counter, OrderedDict, deque
+from concurrent.futures import CancelledError, Future, InvalidStateError, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+
+from utils.phone_checker import FULL_DETAIL, check_phone
+from utils.validation_backends import get_backend
+
+# Worker count override (defaults to one less than the CPU count)
+POOL_WORKERS_ENV = "PHONE_VALIDATOR_POOL_WORKERS"
+# Smallest slice of a chunk worth its own task (pickling overhead dominates below)
+MIN_TASK_ROWS = 250
+
+
+def default_worker_count():
+    """Workers from PHONE_VALIDATOR_POOL_WORKERS, else one per CPU minus one for the server"""
+    configured = os.environ.get(POOL_WORKERS_ENV)
+    if configured:
+        return max(1, int(configured))
+    return max(1, (os.cpu_count() or 2) - 1)
+
+
+# Serializes the __main__ swap of concurrent worker starts
+_spawn_lock = threading.Lock()
+
+
+class _WorkerProcess(multiprocessing.context.SpawnProcess):
+    """Spawned process that starts from an empty __main__ instead of re-running the parent's"""
+
+    def start(self):
+        # Spawn reads sys.modules['__main__'] (its __spec__ or __file__) to
+        # decide what the child runs as __mp_main__; a bare module runs nothing
+        stub = types.ModuleType("__main__")
+        with _spawn_lock:
+            main = sys.modules.get("__main__")
+            sys.modules["__main__"] = stub
+            try:
+                super().start()
+            finally:
+                # A Streamlit script run may have installed its own __main__ meanwhile
+                if sys.modules.get("__main__") is stub:
+                    sys.modules["__main__"] = main
+
+
+class _WorkerContext(multiprocessing.context.SpawnContext):
+    Process = _WorkerProcess
+
+
+def validate_numbers(numbers, backend_name=None, mode=FULL_DETAIL):
+    """
+    Worker task: validate a list of numbers
+
+    Args:
+        numbers (list): Phone number strings
+        backend_name (str): Validation backend name (defaults to get_backend())
+        mode (str): Check mode (see utils.phone_checker.check_phone_detailed)
+
+    Returns:
+        list: Result rows in input order
+    """
+    backend = get_backend(backend_name)
+    return [check_phone(phone, backend=backend, mode=mode) for phone in numbers]
+
+
+class SharedWorkerPool:
+    """
+    Worker pool with per-session fair-share scheduling, quotas and cancellation
+
+    Never hands the executor more tasks than it has workers, so the dispatch
+    order chosen here (round-robin over sessions under quota) is the order
+    tasks actually run in.
+    """
+
+    def __init__(self, workers=None, session_quota=None, processes=True, session_alive=None):
+        """
+        Args:
+            workers (int): Worker processes (defaults to default_worker_count())
+            session_quota (int): Tasks one session may have running at once
+                (defaults to all workers but one, leaving a slot for others)
+            processes (bool): Run tasks in worker processes; False uses threads
+                in this process (no isolation from the server's GIL)
+            session_alive (callable): session_alive(session_id) -> bool; queued
+                tasks of sessions it reports gone are cancelled
+        """
+        self.workers = workers or default_worker_count()
+        self.session_quota = session_quota or max(1, self.workers - 1)
+        if processes:
+            # Spawned, not forked: forking a server full of threads can deadlock the children
+            self._executor = ProcessPoolExecutor(self.workers, mp_context=_WorkerContext())
+        else:
+            self._executor = ThreadPoolExecutor(self.workers, thread_name_prefix="validation-worker")
+        self._session_alive = session_alive
+        self._lock = threading.Lock()
+        self._queues = OrderedDict()  # session_id -> deque of (future, fn, args), in round-robin order
+        self._running = {}  # session_id -> set of futures whose task is running
+        self._in_flight = 0
+        self._counts = Counter()
+        self._closed = False
+
+    def submit(self, session_id, fn, *args):
+        """
+        Queue fn(*args) for a session
+
+        Args:
+            session_id (str): Session the task is accounted to
+            fn (callable): Picklable module-level function when using processes,
+                defined outside __main__ (workers do not import it)
+
+        Returns:
+            Future: Resolves to fn's result; raises CancelledError if the session is cancelled
+
+        Raises:
+            RuntimeError: If the pool has been shut down
+        """
+        future = Future()
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("Worker pool is shut down")
+            self._queues.setdefault(session_id, deque()).append((future, fn, args))
+            self._counts['submitted'] += 1
+        self._dispatch()
+        return future
+
+    def validate(self, session_id, numbers, backend_name=None, mode=FULL_DETAIL):
+        """
+        Validate numbers on the pool and wait for the rows
+
+        The numbers are split into up to `session_quota` tasks of at least
+        MIN_TASK_ROWS rows, so one session can use several workers while
+        others still get their turn between tasks.
+
+        Args:
+            session_id (str): Session the work is accounted to
+            numbers (list): Phone number strings
+            backend_name (str): Validation backend name
+            mode (str): Check mode
+
+        Returns:
+            list: Result rows in input order
+
+        Raises:
+            CancelledError: If the session was cancelled while waiting
+        """
+        numbers = list(numbers)
+        if not numbers:
+            return []
+        parts = max(1, min(self.session_quota, len(numbers) // MIN_TASK_ROWS))
+        part_size = -(-len(numbers) // parts)
+        futures = [
+            self.submit(session_id, validate_numbers, numbers[start:start + part_size], backend_name, mode)
+            for start in range(0, len(numbers), part_size)
+        ]
+        try:
+            rows = []
+            for future in futures:
+                rows.extend(future.result())
+            return rows
+        finally:
+            # Interrupted callers (e.g., a script rerun) leave nothing queued behind
+            for future in futures:
+                future.cancel()
+
+    def cancel_session(self, session_id):
+        """
+        Cancel a session's queued tasks and fail its running ones
+
+        Running tasks keep their worker until they finish; their results are
+        dropped.
+
+        Returns:
+            int: Tasks cancelled
+        """
+        with self._lock:
+            queue = self._queues.pop(session_id, deque())
+            running = list(self._running.get(session_id, ()))
+        cancelled = sum(future.cancel() for future, _, _ in queue)
+        for future in running:
+            try:
+                future.set_exception(CancelledError())
+                cancelled += 1
+            except InvalidStateError:
+                pass  # finished meanwhile
+        with self._lock:
+            self._counts['cancelled'] += cancelled
+        return cancelled
+
+    def stats(self):
+        """
+        Current load and lifetime counters
+
+        Returns:
+            dict: {
+                'workers': int, 'session_quota': int, 'running': int,
+                'queued': int, 'sessions': int (with queued or running tasks),
+                'submitted': int, 'completed': int, 'cancelled': int
+            }
+        """
+        with self._lock:
+            return {
+                'workers': self.workers,
+                'session_quota': self.session_quota,
+                'running': self._in_flight,
+                'queued': sum(len(queue) for queue in self._queues.values()),
+                'sessions': len(set(self._queues) | set(self._running)),
+                'submitted': self._counts['submitted'],
+                'completed': self._counts['completed'],
+                'cancelled': self._counts['cancelled'],
+            }
+
+    def shutdown(self, wait=True):
+        """Cancel every queued task and stop the workers"""
+        with self._lock:
+            self._closed = True
+            sessions = list(set(self._queues) | set(self._running))
+        for session_id in sessions:
+            self.cancel_session(session_id)
+        self._executor.shutdown(wait=wait)
+
+    def _pop_task(self, session_id):
+        """Next task of a session that its caller has not cancelled (lock held)"""
+        queue = self._queues[session_id]
+        while queue:
+            future, fn, args = queue.popleft()
+            if future.set_running_or_notify_cancel():
+                return future, fn, args
+            self._counts['cancelled'] += 1
+        return None
+
+    def _next_task(self):
+        """Pick the next task round-robin over sessions under quota (lock held)"""
+        for session_id in list(self._queues):
+            if self._session_alive is not None and not self._session_alive(session_id):
+                for future, _, _ in self._queues.pop(session_id):
+                    self._counts['cancelled'] += future.cancel()
+                continue
+            if len(self._running.get(session_id, ())) >= self.session_quota:
+                continue
+            task = self._pop_task(session_id)
+            if self._queues[session_id]:
+                self._queues.move_to_end(session_id)
+            else:
+                del self._queues[session_id]
+            if task is not None:
+                return (session_id,) + task
+        return None
+
+    def _dispatch(self):
+        started = []
+        with self._lock:
+            while not self._closed and self._in_flight < self.workers:
+                task = self._next_task()
+                if task is None:
+                    break
+                session_id, future = task[:2]
+                self._in_flight += 1
+                self._running.setdefault(session_id, set()).add(future)
+                started.append(task)
+
+        # Submitted outside the lock: a task can complete (and call back) immediately
+        for session_id, future, fn, args in started:
+            try:
+                work = self._executor.submit(fn, *args)
+            except RuntimeError as error:  # executor shut down or broken
+                work = Future()
+                work.set_exception(error)
+            work.add_done_callback(partial(self._finished, session_id, future))
+
+    def _finished(self, session_id, future, work):
+        with self._lock:
+            self._in_flight -= 1
+            running = self._running.get(session_id)
+            if running is not None:
+                running.discard(future)
+                if not running:
+                    del self._running[session_id]
+            self._counts['completed'] += 1
+        try:
+            error = work.exception()
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(work.result())
+        except InvalidStateError:
+            pass  # cancelled while running; the result is dropped
+        self._dispatch()